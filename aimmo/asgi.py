@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'aimmo.settings')
 
-application = get_asgi_application()
+django.setup(set_prefix = False)
+
+from core.asgi         import AsyncURLConfASGIHandler
+from postings.counters import start_flush_timers
+
+application = AsyncURLConfASGIHandler()
+
+start_flush_timers()
@@ -0,0 +1,9 @@
+"""aimmo URL Configuration for the ASGI entry point
+
+Serves the routes of aimmo.urls with every view wrapped as a coroutine view
+whose database work runs on core.asgi.database_executor.
+"""
+from core.asgi  import asyncify_patterns
+from aimmo.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = asyncify_patterns(sync_urlpatterns)
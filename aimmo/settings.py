@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os, tempfile
+
 from pathlib import Path
 from my_settings import SECRET_KEY, DATABASES, ALGORITHM
 
@@ -46,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -54,9 +58,12 @@ MIDDLEWARE = [
     # 'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.routers.ReplicaRoutingMiddleware',
+    'core.queries.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'aimmo.urls'
+ASGI_URLCONF = 'aimmo.asgi_urls'
 
 TEMPLATES = [
     {
@@ -82,6 +89,69 @@ WSGI_APPLICATION = 'aimmo.wsgi.application'
 
 DATABASES = DATABASES
 
+# every alias besides the primary is a read replica, see core.routers
+DATABASE_ROUTERS           = ['core.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS          = [alias for alias in DATABASES if alias != 'default']
+DATABASE_REPLICA_SELECTION = 'round_robin'
+
+# reads of a client that just wrote stay on the primary for this many seconds
+READ_YOUR_WRITES_WINDOW = 5
+READ_YOUR_WRITES_COOKIE = 'read_primary_until'
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default' : {
+        'BACKEND' : 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'compressed' : {
+        'BACKEND'  : 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION' : 'compressed',
+        'OPTIONS'  : {
+            'MAX_ENTRIES' : 1000,
+        },
+    },
+    # keyed by the stored Posting.version, so a copy in each process is never older than the row
+    'postings' : {
+        'BACKEND'  : 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION' : 'postings',
+        'TIMEOUT'  : 300,
+        'OPTIONS'  : {
+            'MAX_ENTRIES' : 10000,
+        },
+    },
+    # shared by every process on the host without touching the database it protects,
+    # use a memcached / redis backend instead once the web tier runs on more than one host
+    'viewed' : {
+        'BACKEND'  : 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION' : os.path.join(tempfile.gettempdir(), 'aimmo-cache', 'viewed'),
+        'OPTIONS'  : {
+            # two windows per reader, room for 100,000 readers a day
+            'MAX_ENTRIES' : 200000,
+        },
+    },
+    'trending' : {
+        'BACKEND'  : 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION' : 'cache_trending',
+        'TIMEOUT'  : None,
+        'OPTIONS'  : {
+            # one ranking per category and one over all of them
+            'MAX_ENTRIES' : 10000,
+        },
+    },
+    # kept off the database so throttled clients cost it nothing, see 'viewed' for more than one host
+    'ratelimit' : {
+        'BACKEND'  : 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION' : os.path.join(tempfile.gettempdir(), 'aimmo-cache', 'ratelimit'),
+        'OPTIONS'  : {
+            # up to four buckets per client, room for 25,000 clients a minute
+            'MAX_ENTRIES' : 100000,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -152,8 +222,88 @@ CORS_ALLOW_HEADERS = (
     'x-requested-with'
 )
 
+POSTING_PAGE_SIZE     = 20
+POSTING_MAX_PAGE_SIZE = 100
+
+POSTING_STREAM_CHUNK_SIZE = 500
+
+# seconds a process trusts its category registry before re-reading the categories table
+CATEGORY_REGISTRY_CHECK_INTERVAL = 5
+
+COMMENT_THREAD_REPLIES     = 3
+COMMENT_THREAD_MAX_REPLIES = 20
+
+JSON_RENDERER = 'core.renderers.fast_dumps'
+
+# br and zstd are used only when the brotli / zstandard packages are installed
+COMPRESSION_ENCODINGS     = ('br', 'zstd', 'gzip')
+COMPRESSION_CONTENT_TYPES = ('application/json', 'text/plain', 'text/html')
+COMPRESSION_MIN_SIZE      = 1024
+COMPRESSION_CACHE         = 'compressed'
+
+QUERY_BUDGET_RAISE                = False
+QUERY_BUDGET_N_PLUS_ONE_THRESHOLD = 3
+
+METRICS_DIR            = None
+METRICS_FLUSH_INTERVAL = 5
+
+VIEW_COUNT_FLUSH_THRESHOLD = 100
+VIEW_COUNT_FLUSH_INTERVAL  = 10
+
+# HyperLogLog sketches of distinct readers per posting, see postings.unique_views
+UNIQUE_VIEWS_FLUSH_THRESHOLD = 500
+UNIQUE_VIEWS_FLUSH_INTERVAL  = 30
+
+# time-decayed top postings per category, see postings.trending
+TRENDING_CACHE              = 'trending'
+TRENDING_SIZE               = 100
+TRENDING_PAGE_SIZE          = 10
+TRENDING_HALF_LIFE          = 60 * 60 * 6
+TRENDING_VIEW_WEIGHT        = 1
+TRENDING_COMMENT_WEIGHT     = 5
+TRENDING_FLUSH_THRESHOLD    = 100
+TRENDING_FLUSH_INTERVAL     = 10
+TRENDING_REBUILD_HALF_LIVES = 20
+
+PRINCIPAL_CACHE_MAX_ENTRIES = 10000
+PRINCIPAL_CACHE_TIMEOUT     = 300
+
+BCRYPT_ROUNDS          = 12
+BCRYPT_POOL_KIND       = 'thread'
+BCRYPT_POOL_WORKERS    = 4
+BCRYPT_POOL_QUEUE_SIZE = 16
+BCRYPT_POOL_TIMEOUT    = 5
+BCRYPT_RETRY_AFTER     = 1
+
+# token buckets per route and client, (capacity, seconds to refill an empty bucket), see core.ratelimit
+RATE_LIMIT_CACHE = 'ratelimit'
+RATE_LIMITS      = {
+    'signin' : {'ip' : (20, 60), 'email' : (5, 60)},
+    'signup' : {'ip' : (5, 60), 'email' : (3, 60)},
+}
+
 SESSION_COOKIE_AGE = 600
-SESSION_SAVE_EVERY_REQUEST = True
+
+# per-user Bloom filters that keep a reader's repeated views from counting, see postings.dedup
+VIEW_DEDUP_CACHE  = 'viewed'
+VIEW_DEDUP_BITS   = 4096
+VIEW_DEDUP_HASHES = 4
+VIEW_DEDUP_WINDOW = 60 * 60 * 24
+
+# threads running ORM work for async views; each holds its own connection per database
+ASYNC_DB_WORKERS = 8
+
+# database-backed job queue for post-write side effects, see core.jobs and "manage.py run_jobs"
+JOB_BATCH_SIZE    = 100
+JOB_POLL_INTERVAL = 1
+JOB_MAX_ATTEMPTS  = 5
+JOB_RETRY_BACKOFF = 2
+JOB_MAX_BACKOFF   = 300
+JOB_LOCK_TIMEOUT  = 300
+
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_SAMPLE_RATE  = 1.0
+SLOW_QUERY_LOG_FILE     = None
 
 LOGGING = {
     'disable_existing_loggers': False,
@@ -163,19 +313,27 @@ LOGGING = {
             'format': '{asctime} {levelname} {message}',
             'style': '{'
         },
+        'json_lines': {
+            '()': 'core.log.JsonLinesFormatter',
+        },
     },
     'handlers': {
         'console': {
             'class'     : 'logging.StreamHandler',
             'formatter' : 'verbose',
             'level'     : 'DEBUG',
-        }
+        },
+        'slow_query': {
+            'class'     : 'core.log.QueueListenerHandler',
+            'formatter' : 'json_lines',
+            'filename'  : SLOW_QUERY_LOG_FILE,
+        },
     },
     'loggers': {
-        'django.db.backends': {
-            'handlers' : ['console'],
-            'level'    : 'DEBUG',
+        'core.slow_query': {
+            'handlers' : ['slow_query'],
+            'level'    : 'WARNING',
             'propagate': False,
         },
     },
-}
\ No newline at end of file
+}
@@ -15,7 +15,10 @@ Including another URLconf
 """
 from django.urls import path, include
 
+from core.views  import MetricsView
+
 urlpatterns = [
     path('users', include('users.urls')),
     path('postings', include('postings.urls')),
+    path('metrics', MetricsView.as_view()),
 ]
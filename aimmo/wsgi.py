@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'aimmo.settings')
 
 application = get_wsgi_application()
+
+from postings.counters import start_flush_timers
+
+start_flush_timers()
@@ -0,0 +1,180 @@
+import asyncio, contextvars, threading
+
+from asgiref.sync               import sync_to_async
+from concurrent.futures         import ThreadPoolExecutor
+from contextlib                 import nullcontext
+from functools                  import wraps
+
+from django.conf                import settings
+from django.core.handlers.asgi  import ASGIHandler
+from django.db                  import close_old_connections
+from django.urls                import URLPattern, URLResolver
+
+from core.queries               import current_recorder, recording_into
+
+class DatabaseExecutor:
+    """
+    Runs the blocking ORM work of async views on a fixed pool of threads.
+
+    Every worker keeps at most one connection per database, so ``max_workers``
+    caps the connections an ASGI process opens however many clients are waiting;
+    requests beyond that queue in the event loop without holding a thread.
+    """
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self.lock        = threading.Lock()
+        self.executor    = None
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers = self.max_workers, thread_name_prefix = 'db')
+
+            return self.executor
+
+    async def run(self, func, *args, **kwargs):
+        context = contextvars.copy_context()
+        loop    = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(self.get_executor(), context.run, self.call, func, args, kwargs)
+
+    def call(self, func, args, kwargs):
+        # worker threads never see request_started/request_finished, so they
+        # expire their own connections the way the request signals would
+        recorder = current_recorder.get()
+        close_old_connections()
+
+        try:
+            with recording_into(recorder) if recorder is not None else nullcontext():
+                return func(*args, **kwargs)
+
+        finally:
+            close_old_connections()
+
+    async def stream(self, iterable, buffer = 8):
+        """
+        Iterates ``iterable`` on a single worker, so a database cursor it holds stays on
+        that worker's connection, and yields the items as they are produced. The worker
+        waits while ``buffer`` items are unsent, so a slow client never makes it read
+        the rest of the body into memory.
+        """
+        loop    = asyncio.get_running_loop()
+        queue   = asyncio.Queue(maxsize = buffer)
+        stopped = threading.Event()
+        done    = object()
+
+        def produce():
+            try:
+                for item in iterable:
+                    if stopped.is_set():
+                        break
+
+                    asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+            finally:
+                asyncio.run_coroutine_threadsafe(queue.put(done), loop).result()
+
+        producer = asyncio.ensure_future(self.run(produce))
+
+        try:
+            while True:
+                item = await queue.get()
+
+                if item is done:
+                    break
+
+                yield item
+
+            await producer
+
+        finally:
+            # a client that went away leaves the worker blocked on a full queue, drain it until the worker stops
+            stopped.set()
+
+            while not producer.done():
+                getter = asyncio.ensure_future(queue.get())
+
+                await asyncio.wait({producer, getter}, return_when = asyncio.FIRST_COMPLETED)
+                getter.cancel()
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+database_executor = DatabaseExecutor(settings.ASYNC_DB_WORKERS)
+
+def async_view(view):
+    """
+    Turns a sync view into a coroutine view whose whole body runs on ``database_executor``.
+    Streamed bodies are produced on the executor as well, see ``AsyncURLConfASGIHandler``.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await database_executor.run(view, request, *args, **kwargs)
+
+    return wrapper
+
+def asyncify_patterns(patterns):
+    """
+    Copies a URLconf with every view wrapped by ``async_view``, so the ASGI
+    entry point serves the same routes without duplicating them.
+    """
+    async_patterns = []
+
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            async_patterns.append(URLResolver(
+                pattern.pattern,
+                asyncify_patterns(pattern.url_patterns),
+                pattern.default_kwargs,
+                pattern.app_name,
+                pattern.namespace,
+            ))
+
+        elif isinstance(pattern, URLPattern):
+            async_patterns.append(URLPattern(pattern.pattern, async_view(pattern.callback), pattern.default_args, pattern.name))
+
+    return async_patterns
+
+class AsyncURLConfASGIHandler(ASGIHandler):
+    """
+    ASGI handler that resolves requests against ``settings.ASGI_URLCONF``.
+
+    Django 3.2 iterates streamed bodies synchronously in the event loop, where their
+    queries cannot run; this handler sends them chunk by chunk as
+    ``database_executor`` produces them instead.
+    """
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+
+        if request is not None:
+            request.urlconf = settings.ASGI_URLCONF
+
+        return request, error_response
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        headers = [
+            (header.encode('ascii') if isinstance(header, str) else header, value.encode('latin1') if isinstance(value, str) else value)
+            for header, value in response.items()
+        ]
+        headers += [(b'Set-Cookie', cookie.output(header = '').encode('ascii').strip()) for cookie in response.cookies.values()]
+
+        await send({'type' : 'http.response.start', 'status' : response.status_code, 'headers' : headers})
+
+        parts = database_executor.stream(response)
+
+        try:
+            async for part in parts:
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({'type' : 'http.response.body', 'body' : chunk, 'more_body' : True})
+
+        finally:
+            await parts.aclose()
+
+        await send({'type' : 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive = True)()
@@ -0,0 +1,142 @@
+import gzip, hashlib
+
+from django.conf                 import settings
+from django.core.cache           import caches
+from django.utils.cache          import patch_vary_headers
+from django.utils.deprecation    import MiddlewareMixin
+
+from core.metrics                import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+def gzip_compress(data):
+    return gzip.compress(data, compresslevel = 6, mtime = 0)
+
+def brotli_compress(data):
+    return brotli.compress(data, quality = 5)
+
+def zstd_compress(data):
+    return zstandard.ZstdCompressor(level = 3).compress(data)
+
+def available_encodings():
+    """
+    Returns the supported encodings in order of preference, skipping libraries that are not installed.
+    """
+    compressors = {
+        'br'   : brotli_compress if brotli else None,
+        'zstd' : zstd_compress if zstandard else None,
+        'gzip' : gzip_compress,
+    }
+
+    return [(encoding, compressors[encoding]) for encoding in settings.COMPRESSION_ENCODINGS if compressors.get(encoding)]
+
+def parse_accept_encoding(header):
+    accepted = {}
+
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality           = 1.0
+
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+
+            if name == 'q':
+                try:
+                    quality = float(value)
+
+                except ValueError:
+                    quality = 0.0
+
+        if coding:
+            accepted[coding.strip().lower()] = quality
+
+    return accepted
+
+def choose_encoding(header):
+    accepted = parse_accept_encoding(header)
+
+    for encoding, compress in available_encodings():
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding, compress
+
+    return None, None
+
+def cache_compressed(response):
+    """
+    Marks a response whose body was served from a cache, so that its compressed
+    bytes are cached too and repeated hits skip recompression.
+    """
+    response.cache_compressed = True
+
+    return response
+
+def compressed_key(encoding, content):
+    return f'compressed:{encoding}:{hashlib.sha1(content).hexdigest()}'
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compresses successful responses of ``COMPRESSION_CONTENT_TYPES`` that are at
+    least ``COMPRESSION_MIN_SIZE`` bytes, with the best encoding the client accepts.
+    Streaming responses are left alone so that they keep flushing row by row.
+    """
+    def process_response(self, request, response):
+        if response.streaming or response.status_code != 200 or response.has_header('Content-Encoding'):
+            return response
+
+        if response.get('Content-Type', '').split(';')[0].strip() not in settings.COMPRESSION_CONTENT_TYPES:
+            return response
+
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding, compress = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+        if encoding is None:
+            return response
+
+        compressed = self.compress(response, encoding, compress)
+
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content             = compressed
+        response['Content-Length']   = str(len(compressed))
+        response['Content-Encoding'] = encoding
+
+        # the compressed body is a different representation, like GZipMiddleware the ETag becomes weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        return response
+
+    def compress(self, response, encoding, compress):
+        if not getattr(response, 'cache_compressed', False):
+            metrics.inc('http_response_compression_total', {'encoding' : encoding, 'result' : 'compressed'})
+
+            return compress(response.content)
+
+        cache      = caches[settings.COMPRESSION_CACHE]
+        key        = compressed_key(encoding, response.content)
+        compressed = cache.get(key)
+
+        if compressed is None:
+            metrics.inc('http_response_compression_total', {'encoding' : encoding, 'result' : 'compressed'})
+
+            compressed = compress(response.content)
+            cache.set(key, compressed)
+
+        else:
+            metrics.inc('http_response_compression_total', {'encoding' : encoding, 'result' : 'cached'})
+
+        return compressed
@@ -0,0 +1,164 @@
+import json, logging, os, socket
+
+from datetime         import timedelta
+
+from django.conf      import settings
+from django.db        import transaction
+from django.db.models import F, Q
+from django.utils     import timezone
+
+from core.metrics     import metrics
+from core.models      import Job
+
+logger = logging.getLogger(__name__)
+
+# kind -> function taking the payloads of a batch of jobs of that kind
+JOB_HANDLERS = {}
+
+class JobReclaimed(Exception):
+    """
+    Raised when jobs of a running batch were claimed again after their lock expired.
+    """
+
+def job_handler(kind):
+    """
+    Registers the decorated function as the handler of ``kind`` jobs.
+
+    A handler receives the payloads of every claimed job of its kind at once and runs
+    in the transaction that deletes those jobs, only while the worker still holds
+    them. It may run again for the same payloads, or a part of them, after a failure,
+    so it must be idempotent.
+    """
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+
+        return func
+
+    return decorator
+
+def enqueue(kind, **payload):
+    """
+    Stores a job in the current transaction, so it exists exactly when the writes it follows up on do.
+    """
+    return Job.objects.create(kind = kind, payload = json.dumps(payload))
+
+def get_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+def get_backoff(attempts):
+    return min(settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOB_MAX_BACKOFF)
+
+def claimable(now):
+    # running jobs whose lock expired belong to a worker that died
+    return Q(state = Job.PENDING, run_at__lte = now) | Q(state = Job.RUNNING, locked_at__lt = now - timedelta(seconds = settings.JOB_LOCK_TIMEOUT))
+
+def claim_jobs(worker_id, batch_size, kinds = None):
+    """
+    Locks up to ``batch_size`` due jobs for ``worker_id``. The conditional update lets
+    concurrent workers claim from the same rows without handing a job out twice.
+    """
+    now  = timezone.now()
+    jobs = Job.objects.filter(claimable(now))
+
+    if kinds:
+        jobs = jobs.filter(kind__in = kinds)
+
+    job_ids = list(jobs.order_by('run_at', 'id').values_list('id', flat = True)[:batch_size])
+
+    if not job_ids:
+        return []
+
+    Job.objects.filter(claimable(now), id__in = job_ids).update(
+        state     = Job.RUNNING,
+        locked_by = worker_id,
+        locked_at = now,
+        attempts  = F('attempts') + 1,
+    )
+
+    return list(Job.objects.filter(id__in = job_ids, state = Job.RUNNING, locked_by = worker_id, locked_at = now).order_by('id'))
+
+def run_jobs(kind, batch):
+    """
+    Runs ``batch`` through the handler of ``kind`` in one transaction and deletes it
+    on success. A failed batch is split in halves that run on their own, so healthy
+    jobs still complete and only the jobs that fail alone are retried with exponential
+    backoff up to ``JOB_MAX_ATTEMPTS``.
+
+    A batch that outlives ``JOB_LOCK_TIMEOUT`` may be claimed again by another worker.
+    The jobs are deleted under the lock that claimed them before the handler runs,
+    so only the worker still holding every job of the batch applies it.
+    """
+    try:
+        handler = JOB_HANDLERS[kind]
+
+        with transaction.atomic():
+            deleted, _ = Job.objects.filter(
+                id__in    = [job.id for job in batch],
+                locked_by = batch[0].locked_by,
+                locked_at = batch[0].locked_at,
+            ).delete()
+
+            if deleted != len(batch):
+                raise JobReclaimed(kind)
+
+            handler([json.loads(job.payload) for job in batch])
+
+    except JobReclaimed:
+        logger.warning('Job batch of %d %s jobs was claimed again by another worker, skipping it', len(batch), kind)
+        metrics.inc('jobs_total', {'kind' : kind, 'result' : 'reclaimed'}, len(batch))
+
+    except Exception as error:
+        if len(batch) > 1 and kind in JOB_HANDLERS:
+            logger.warning('Job batch of %d %s jobs failed, running it in halves', len(batch), kind)
+            middle = len(batch) // 2
+
+            run_jobs(kind, batch[:middle])
+            run_jobs(kind, batch[middle:])
+
+            return
+
+        logger.exception('Job batch of %d %s jobs failed', len(batch), kind)
+        metrics.inc('jobs_total', {'kind' : kind, 'result' : 'failed'}, len(batch))
+
+        for job in batch:
+            retry = job.attempts < settings.JOB_MAX_ATTEMPTS and kind in JOB_HANDLERS
+
+            Job.objects.filter(id = job.id, locked_by = job.locked_by, locked_at = job.locked_at).update(
+                state      = Job.PENDING if retry else Job.FAILED,
+                run_at     = timezone.now() + timedelta(seconds = get_backoff(job.attempts)),
+                locked_by  = '',
+                locked_at  = None,
+                last_error = repr(error),
+            )
+
+    else:
+        metrics.inc('jobs_total', {'kind' : kind, 'result' : 'done'}, len(batch))
+
+def run_batch(jobs):
+    """
+    Runs claimed jobs grouped by kind, see ``run_jobs``.
+    """
+    batches = {}
+
+    for job in jobs:
+        batches.setdefault(job.kind, []).append(job)
+
+    for kind, batch in batches.items():
+        run_jobs(kind, batch)
+
+def run_pending_jobs(worker_id = None, batch_size = None, kinds = None):
+    """
+    Runs due jobs until none is left and returns how many were claimed.
+    """
+    worker_id  = worker_id or get_worker_id()
+    batch_size = batch_size or settings.JOB_BATCH_SIZE
+    claimed    = 0
+
+    while True:
+        jobs = claim_jobs(worker_id, batch_size, kinds)
+
+        if not jobs:
+            return claimed
+
+        run_batch(jobs)
+        claimed += len(jobs)
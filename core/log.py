@@ -0,0 +1,50 @@
+import atexit, json, logging, queue
+
+from datetime         import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object, including the fields passed through ``extra``.
+    """
+    fields = ('view', 'shape', 'duration_ms', 'database')
+
+    def format(self, record):
+        entry = {
+            'time'    : datetime.fromtimestamp(record.created).isoformat(),
+            'level'   : record.levelname,
+            'logger'  : record.name,
+            'message' : record.getMessage(),
+        }
+        entry.update({field : getattr(record, field) for field in self.fields if hasattr(record, field)})
+
+        return json.dumps(entry, ensure_ascii = False)
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Hands records to a background listener thread that formats and writes them,
+    so the logging call never waits on I/O. Records are dropped once ``max_size``
+    are waiting.
+    """
+    def __init__(self, filename = None, max_size = 10000):
+        super().__init__(queue.Queue(max_size))
+
+        self.target   = logging.FileHandler(filename, encoding = 'utf-8') if filename else logging.StreamHandler()
+        self.listener = QueueListener(self.queue, self.target)
+        self.dropped  = 0
+
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+
+        except queue.Full:
+            self.dropped += 1
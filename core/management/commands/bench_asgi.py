@@ -0,0 +1,38 @@
+import json
+
+from core.management.commands.bench_routes import Command as BenchRoutesCommand
+
+class Command(BenchRoutesCommand):
+    help = 'Compares WSGI and ASGI throughput of the read routes at the same client concurrency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type = int, default = 200, help = 'requests per route')
+        parser.add_argument('--concurrency', type = int, default = 64)
+        parser.add_argument('--output', help = 'write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        routes  = {name : request_for for name, request_for in self.build_routes(options['requests']).items() if name.startswith('GET ')}
+        results = {}
+
+        try:
+            for interface in ('wsgi', 'asgi'):
+                self.stdout.write(self.style.MIGRATE_HEADING(interface.upper()))
+                results[interface] = self.run_routes(routes, interface, options['requests'], options['concurrency'])
+
+        finally:
+            self.delete_bench_rows()
+
+        self.stdout.write(self.style.MIGRATE_HEADING('ASGI / WSGI'))
+
+        for name in routes:
+            wsgi = results['wsgi']['routes'][name]
+            asgi = results['asgi']['routes'][name]
+
+            self.stdout.write(
+                f'{name:<44} throughput x{asgi["throughput"] / wsgi["throughput"]:.2f}  '
+                f'p95 {wsgi["p95"]:.2f}ms -> {asgi["p95"]:.2f}ms'
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(results, output_file, indent = 2)
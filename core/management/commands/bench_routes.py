@@ -0,0 +1,358 @@
+import asyncio, io, json, threading, time, urllib.error, urllib.parse, urllib.request, jwt
+
+from concurrent.futures          import ThreadPoolExecutor
+from contextlib                  import contextmanager
+from socketserver                import ThreadingMixIn
+from wsgiref.simple_server       import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf                 import settings
+from django.core.handlers.wsgi   import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test                 import Client, override_settings
+from django.urls                 import URLPattern, URLResolver, get_resolver
+
+from core.asgi                   import AsyncURLConfASGIHandler
+from core.jobs                   import enqueue, run_pending_jobs
+from postings.models             import Category, Comment, Posting
+from users.models                import User
+
+SEED_PASSWORD = 'seedpassword1!'
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def percentile(values, rank):
+    ordered = sorted(values)
+
+    return ordered[min(len(ordered) - 1, max(0, int(round(rank / 100 * len(ordered))) - 1))]
+
+def url_patterns(resolver = None, prefix = ''):
+    for pattern in (resolver or get_resolver()).url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from url_patterns(pattern, prefix + str(pattern.pattern))
+
+        elif isinstance(pattern, URLPattern):
+            yield prefix + str(pattern.pattern), pattern.callback
+
+class Command(BaseCommand):
+    help = 'Benchmarks every posting and user route and compares the results with a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type = int, default = 200, help = 'requests per route')
+        parser.add_argument('--concurrency', type = int, default = 8)
+        parser.add_argument(
+            '--interface', choices = ('client', 'wsgi', 'asgi', 'server'), default = 'client',
+            help = 'test client, in-process WSGI or ASGI handler, or a local threaded WSGI server',
+        )
+        parser.add_argument('--output', help = 'write the results to this JSON file')
+        parser.add_argument('--baseline', help = 'fail when results regress against this JSON file')
+        parser.add_argument('--tolerance', type = float, default = 0.2)
+        parser.add_argument(
+            '--rate-limits', action = 'store_true',
+            help = 'keep RATE_LIMITS, by default they are lifted so every request does the full work',
+        )
+
+    def handle(self, *args, **options):
+        routes = self.build_routes(options['requests'])
+
+        try:
+            self.check_coverage(routes)
+
+            with override_settings(RATE_LIMITS = settings.RATE_LIMITS if options['rate_limits'] else {}):
+                results = self.run_routes(routes, options['interface'], options['requests'], options['concurrency'])
+
+        finally:
+            self.delete_bench_rows()
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(results, output_file, indent = 2)
+
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'])
+
+    def run_routes(self, routes, interface, count, concurrency):
+        results = {
+            'meta'   : {'requests' : count, 'concurrency' : concurrency, 'interface' : interface},
+            'routes' : {},
+        }
+
+        with self.sender(interface) as send:
+            for name, request_for in routes.items():
+                results['routes'][name] = self.run_route(send, request_for, count, concurrency)
+                self.report(name, results['routes'][name])
+
+        return results
+
+    @contextmanager
+    def sender(self, interface):
+        if interface == 'client':
+            yield self.client_sender()
+
+        elif interface == 'wsgi':
+            yield self.wsgi_sender(WSGIHandler())
+
+        elif interface == 'asgi':
+            loop   = asyncio.new_event_loop()
+            thread = threading.Thread(target = loop.run_forever, daemon = True)
+            thread.start()
+
+            try:
+                yield self.asgi_sender(AsyncURLConfASGIHandler(), loop)
+
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.close()
+
+        else:
+            server = make_server('127.0.0.1', 0, WSGIHandler(), server_class = ThreadingWSGIServer, handler_class = QuietRequestHandler)
+            threading.Thread(target = server.serve_forever, daemon = True).start()
+
+            try:
+                yield self.server_sender(server)
+
+            finally:
+                server.shutdown()
+
+    def build_routes(self, count):
+        """
+        Maps each URL pattern to a function returning ``(method, path, body, headers)`` for the i-th request.
+        Write routes get their own rows so that every request does real work. Every row the
+        run creates carries ``self.marker`` and is deleted by ``delete_bench_rows``.
+        """
+        user = User.objects.filter(email__startswith = 'seed').order_by('id').first()
+        if user is None:
+            raise CommandError('No seeded users found, run "manage.py seed_data" first')
+
+        category = Category.objects.order_by('id').first()
+        posting  = Posting.objects.order_by('-comment_count', 'id').first()
+        comment  = Comment.objects.filter(parent_comment__isnull = True).order_by('-child_comment_count', 'id').first()
+        if posting is None or comment is None:
+            raise CommandError('No seeded postings or comments found, run "manage.py seed_data" first')
+
+        headers = {'Authorization' : jwt.encode({'id' : user.id}, settings.SECRET_KEY, algorithm = settings.ALGORITHM)}
+        marker  = f'bench{int(time.time())}'
+
+        self.user, self.posting, self.marker = user, posting, marker
+
+        Posting.objects.bulk_create([
+            Posting(category = category, user = user, title = f'{marker} {index}', content = 'bench')
+            for index in range(count * 2)
+        ])
+        Comment.objects.bulk_create([
+            Comment(posting = posting, user = user, content = f'{marker} {index}')
+            for index in range(count * 2)
+        ])
+
+        # bulk_create does not return ids on every backend, read them back in creation order
+        posting_ids = list(Posting.objects.filter(user = user, title__startswith = marker).order_by('id').values_list('id', flat = True))
+        comment_ids = list(Comment.objects.filter(user = user, content__startswith = marker).order_by('id').values_list('id', flat = True))
+
+        def body(**data):
+            return json.dumps(data)
+
+        return {
+            'GET postings'                       : lambda i: ('GET', '/postings?keyword=게시&limit=20', None, {}),
+            'POST postings'                      : lambda i: ('POST', '/postings', body(category_id = category.id, title = marker, content = '벤치마크 ' * 20), headers),
+            'GET postings/categories'            : lambda i: ('GET', '/postings/categories', None, {}),
+            'GET postings/trending'              : lambda i: ('GET', f'/postings/trending?category_id={category.id}', None, {}),
+            'GET postings/<int:posting_id>'      : lambda i: ('GET', f'/postings/{posting.id}', None, {}),
+            'POST postings/<int:posting_id>'     : lambda i: ('POST', f'/postings/{posting_ids[i]}', body(title = f'{marker} {i}'), headers),
+            'DELETE postings/<int:posting_id>'   : lambda i: ('DELETE', f'/postings/{posting_ids[count + i]}', None, headers),
+            'GET postings/comments/<int:posting_id>'  : lambda i: ('GET', f'/postings/comments/{posting.id}', None, {}),
+            'GET postings/comments/<int:posting_id>/thread' : lambda i: ('GET', f'/postings/comments/{posting.id}/thread', None, {}),
+            'POST postings/comments/<int:posting_id>' : lambda i: ('POST', f'/postings/comments/{posting.id}', body(content = marker), headers),
+            'GET postings/comment/<int:comment_id>'    : lambda i: ('GET', f'/postings/comment/{comment.id}', None, {}),
+            'PATCH postings/comment/<int:comment_id>'  : lambda i: ('PATCH', f'/postings/comment/{comment_ids[i]}', body(content = f'{marker} {i}'), headers),
+            'DELETE postings/comment/<int:comment_id>' : lambda i: ('DELETE', f'/postings/comment/{comment_ids[count + i]}', None, headers),
+            'POST users/signup'                  : lambda i: ('POST', '/users/signup', body(name = 'bench', email = f'{marker}-{i}@example.com', password = SEED_PASSWORD), {}),
+            'POST users/signin'                  : lambda i: ('POST', '/users/signin', body(email = user.email, password = SEED_PASSWORD), {}),
+        }
+
+    def delete_bench_rows(self):
+        """
+        Deletes the fixtures and every row the write routes created, and recounts the
+        comments of the seeded posting right away, together with the recounts the
+        comment routes queued, so the next run starts from the same counts.
+        """
+        Comment.objects.filter(user = self.user, content__startswith = self.marker).delete()
+        Posting.objects.filter(user = self.user, title__startswith = self.marker).delete()
+        User.objects.filter(email__startswith = f'{self.marker}-').delete()
+
+        enqueue('recount_comments', posting_id = self.posting.id)
+        run_pending_jobs(kinds = ['recount_comments'])
+
+    def check_coverage(self, routes):
+        covered = {name.split(' ', 1)[1] for name in routes}
+        missing = [
+            pattern for pattern, callback in url_patterns()
+            if pattern.startswith(('postings', 'users')) and pattern not in covered
+        ]
+
+        if missing:
+            raise CommandError(f'No benchmark defined for: {", ".join(missing)}')
+
+    def client_sender(self):
+        local = threading.local()
+
+        def send(method, path, body, headers):
+            if not hasattr(local, 'client'):
+                local.client = Client(raise_request_exception = False)
+
+            extra = {f'HTTP_{name.upper().replace("-", "_")}' : value for name, value in headers.items()}
+
+            return getattr(local.client, method.lower())(path, body, content_type = 'application/json', **extra).status_code
+
+        return send
+
+    def wsgi_sender(self, handler):
+        def send(method, path, body, headers):
+            path, _, query = path.partition('?')
+            data           = body.encode('utf-8') if body else b''
+            environ        = {
+                'REQUEST_METHOD'    : method,
+                'PATH_INFO'         : path,
+                'QUERY_STRING'      : urllib.parse.quote(query, safe = '=&'),
+                'CONTENT_TYPE'      : 'application/json',
+                'CONTENT_LENGTH'    : str(len(data)),
+                'SERVER_NAME'       : '127.0.0.1',
+                'SERVER_PORT'       : '80',
+                'REMOTE_ADDR'       : '127.0.0.1',
+                'wsgi.input'        : io.BytesIO(data),
+                'wsgi.url_scheme'   : 'http',
+                'wsgi.errors'       : io.StringIO(),
+            }
+            environ.update({f'HTTP_{name.upper().replace("-", "_")}' : value for name, value in headers.items()})
+
+            statuses = []
+            response = handler(environ, lambda status, response_headers, exc_info = None: statuses.append(int(status.split()[0])))
+
+            try:
+                for _ in response:
+                    pass
+
+            finally:
+                response.close()
+
+            return statuses[0]
+
+        return send
+
+    def asgi_sender(self, application, loop):
+        async def call(method, path, body, headers):
+            path, _, query = path.partition('?')
+            scope          = {
+                'type'         : 'http',
+                'asgi'         : {'version' : '3.0'},
+                'http_version' : '1.1',
+                'method'       : method,
+                'scheme'       : 'http',
+                'path'         : path,
+                'query_string' : urllib.parse.quote(query, safe = '=&').encode('ascii'),
+                'headers'      : [(b'content-type', b'application/json')] + [
+                    (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()
+                ],
+                'server'       : ('127.0.0.1', 80),
+                'client'       : ('127.0.0.1', 0),
+            }
+            messages = [{'type' : 'http.request', 'body' : body.encode('utf-8') if body else b'', 'more_body' : False}]
+            statuses = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+
+                return await loop.create_future()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            await application(scope, receive, send)
+
+            return statuses[0]
+
+        def send(method, path, body, headers):
+            return asyncio.run_coroutine_threadsafe(call(method, path, body, headers), loop).result()
+
+        return send
+
+    def server_sender(self, server):
+        base_url = f'http://127.0.0.1:{server.server_port}'
+
+        def send(method, path, body, headers):
+            request = urllib.request.Request(
+                base_url + urllib.parse.quote(path, safe = '/?=&'),
+                data    = body.encode('utf-8') if body else None,
+                headers = dict(headers, **{'Content-Type' : 'application/json'}),
+                method  = method,
+            )
+
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                    return response.status
+
+            except urllib.error.HTTPError as error:
+                return error.code
+
+        return send
+
+    def run_route(self, send, request_for, count, concurrency):
+        def timed(index):
+            started = time.perf_counter()
+            status  = send(*request_for(index))
+
+            return time.perf_counter() - started, status
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers = concurrency) as executor:
+            samples = list(executor.map(timed, range(count)))
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency * 1000 for latency, _ in samples]
+
+        return {
+            'throughput' : round(count / elapsed, 2),
+            'errors'     : sum(1 for _, status in samples if status >= 500),
+            'p50'        : round(percentile(latencies, 50), 3),
+            'p95'        : round(percentile(latencies, 95), 3),
+            'p99'        : round(percentile(latencies, 99), 3),
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:<44} {result["throughput"]:>9.1f} req/s  p50 {result["p50"]:>8.2f}ms  '
+            f'p95 {result["p95"]:>8.2f}ms  p99 {result["p99"]:>8.2f}ms  errors {result["errors"]}'
+        )
+
+    def compare(self, results, baseline_path, tolerance):
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = []
+
+        for name, expected in baseline['routes'].items():
+            actual = results['routes'].get(name)
+
+            if actual is None:
+                continue
+
+            if actual['p95'] > expected['p95'] * (1 + tolerance):
+                regressions.append(f'{name}: p95 {actual["p95"]}ms > baseline {expected["p95"]}ms')
+
+            if actual['throughput'] < expected['throughput'] * (1 - tolerance):
+                regressions.append(f'{name}: throughput {actual["throughput"]} < baseline {expected["throughput"]}')
+
+            if actual['errors'] > expected['errors']:
+                regressions.append(f'{name}: {actual["errors"]} errors > baseline {expected["errors"]}')
+
+        if regressions:
+            raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
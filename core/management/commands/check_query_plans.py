@@ -0,0 +1,208 @@
+import json, re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db                   import connection, transaction
+from django.test                 import Client
+from django.test.utils           import CaptureQueriesContext
+
+from core.queries                import normalize_sql
+from postings.counters           import view_counter
+from postings.models             import Comment, Posting
+from postings.trending           import trending_counter
+from postings.unique_views       import unique_view_counter
+from users.models                import User
+
+try:
+    from pymongo import monitoring
+except ImportError:
+    monitoring = None
+
+# small lookup tables that are expected to be read whole
+SCAN_ALLOWED = ('categories', 'django_session')
+SQLITE_SCAN  = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+def sqlite_plan(cursor, sql):
+    cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+    details = [row[-1] for row in cursor.fetchall()]
+
+    return details, [match.group(1) for match in map(SQLITE_SCAN.match, details) if match]
+
+def postgresql_plan(cursor, sql):
+    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+    plan  = cursor.fetchone()[0]
+    plan  = json.loads(plan) if isinstance(plan, str) else plan
+    nodes = [plan[0]['Plan']]
+    scans = []
+
+    while nodes:
+        node = nodes.pop()
+
+        if node['Node Type'] == 'Seq Scan':
+            scans.append(node['Relation Name'])
+
+        nodes.extend(node.get('Plans', []))
+
+    return [json.dumps(plan)], scans
+
+def mysql_plan(cursor, sql):
+    cursor.execute('EXPLAIN ' + sql)
+    columns = [column[0] for column in cursor.description]
+    rows    = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    return [json.dumps(row, default = str) for row in rows], [row['table'] for row in rows if row['type'] == 'ALL']
+
+SQL_PLANS = {
+    'sqlite'     : sqlite_plan,
+    'postgresql' : postgresql_plan,
+    'mysql'      : mysql_plan,
+}
+
+def collection_scans(plan):
+    if isinstance(plan, dict):
+        if plan.get('stage') == 'COLLSCAN':
+            yield plan
+
+        for value in plan.values():
+            yield from collection_scans(value)
+
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from collection_scans(value)
+
+def command_recorder():
+    """
+    Builds a pymongo listener that keeps the read commands djongo sends.
+    pymongo only attaches listeners to clients created after registration.
+    """
+    class CommandRecorder(monitoring.CommandListener):
+        def __init__(self):
+            self.commands = []
+
+        def started(self, event):
+            if event.command_name in ('find', 'aggregate', 'count'):
+                self.commands.append((event.command_name, dict(event.command)))
+
+        def succeeded(self, event):
+            pass
+
+        def failed(self, event):
+            pass
+
+    return CommandRecorder()
+
+class Command(BaseCommand):
+    help = 'Explains the queries of every hot read path and fails when one of them scans a whole table or collection'
+
+    # system checks must not open a database connection before the pymongo listener is registered
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--show-plans', action = 'store_true')
+
+    def handle(self, *args, **options):
+        recorder = None
+
+        if connection.vendor == 'djongo':
+            if monitoring is None:
+                raise CommandError('pymongo is required to explain djongo queries')
+
+            recorder = command_recorder()
+            monitoring.register(recorder)
+
+        elif connection.vendor not in SQL_PLANS:
+            raise CommandError(f'Query plans are not supported for the {connection.vendor} backend')
+
+        scans = []
+
+        with transaction.atomic():
+            for name, (method, path, body) in self.build_paths().items():
+                if recorder is None:
+                    plans = self.explain_sql(method, path, body)
+                else:
+                    plans = self.explain_mongo(recorder, method, path, body)
+
+                for shape, details, scanned in plans:
+                    status = f'SCAN {", ".join(scanned)}' if scanned else 'ok'
+                    self.stdout.write(f'{name:<24} {status:<20} {shape[:120]}')
+
+                    if options['show_plans']:
+                        for detail in details:
+                            self.stdout.write(f'    {detail}')
+
+                    scans.extend(f'{name}: {table} ({shape})' for table in scanned)
+
+            transaction.set_rollback(True)
+
+        # the posting detail request buffered views that must not be flushed
+        view_counter.reset()
+        unique_view_counter.reset()
+        trending_counter.reset()
+
+        if scans:
+            raise CommandError('Hot paths scan whole tables:\n' + '\n'.join(scans))
+
+        self.stdout.write(self.style.SUCCESS('Every hot path is served by an index'))
+
+    def build_paths(self):
+        posting = Posting.objects.order_by('-comment_count', 'id').first()
+        comment = Comment.objects.filter(parent_comment__isnull = True).order_by('-child_comment_count', 'id').first()
+        user    = User.objects.order_by('id').first()
+
+        if posting is None or comment is None or user is None:
+            raise CommandError('No postings, comments or users found, run "manage.py seed_data" first')
+
+        return {
+            'posting list'      : ('GET', '/postings', None),
+            'posting category'  : ('GET', f'/postings?category_id={posting.category_id}', None),
+            'posting search'    : ('GET', '/postings?keyword=게시', None),
+            'posting detail'    : ('GET', f'/postings/{posting.id}', None),
+            'trending'          : ('GET', f'/postings/trending?category_id={posting.category_id}', None),
+            'comment list'      : ('GET', f'/postings/comments/{posting.id}', None),
+            'comment thread'    : ('GET', f'/postings/comments/{posting.id}/thread', None),
+            'replies'           : ('GET', f'/postings/comment/{comment.id}', None),
+            'sign in'           : ('POST', '/users/signin', json.dumps({'email' : user.email, 'password' : ''})),
+        }
+
+    def send(self, method, path, body):
+        client = Client(raise_request_exception = False)
+
+        return getattr(client, method.lower())(path, body, content_type = 'application/json')
+
+    def explain_sql(self, method, path, body):
+        with CaptureQueriesContext(connection) as context:
+            self.send(method, path, body)
+
+        plans = []
+
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                sql = query['sql']
+
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+
+                details, scanned = SQL_PLANS[connection.vendor](cursor, sql)
+                plans.append((normalize_sql(sql), details, [table for table in scanned if table not in SCAN_ALLOWED]))
+
+        return plans
+
+    def explain_mongo(self, recorder, method, path, body):
+        recorder.commands.clear()
+        self.send(method, path, body)
+
+        plans    = []
+        database = connection.connection
+
+        for command_name, command in list(recorder.commands):
+            collection = command[command_name]
+
+            if collection in SCAN_ALLOWED:
+                continue
+
+            command = {key : value for key, value in command.items() if not key.startswith('$') and key != 'lsid'}
+            plan    = database.command({'explain' : command, 'verbosity' : 'queryPlanner'})
+            scanned = [collection for _ in collection_scans(plan)][:1]
+
+            plans.append((f'{command_name} {collection} {json.dumps(command, default = str)}', [json.dumps(plan, default = str)], scanned))
+
+        return plans
@@ -0,0 +1,67 @@
+import multiprocessing, signal, time
+
+from django.conf                 import settings
+from django.core.management.base import BaseCommand
+from django.db                   import close_old_connections, connections
+
+from core.jobs                   import get_worker_id, run_pending_jobs
+
+def work(batch_size, poll_interval, stopping):
+    worker_id = get_worker_id()
+
+    # the parent handles Ctrl+C and asks workers to stop between batches
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    while not stopping.is_set():
+        close_old_connections()
+
+        if not run_pending_jobs(worker_id, batch_size):
+            stopping.wait(poll_interval)
+
+    connections.close_all()
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs in worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type = int, default = 1)
+        parser.add_argument('--batch-size', type = int, default = settings.JOB_BATCH_SIZE)
+        parser.add_argument('--poll-interval', type = float, default = settings.JOB_POLL_INTERVAL)
+        parser.add_argument('--once', action = 'store_true', help = 'run the due jobs in this process and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            claimed = run_pending_jobs(batch_size = options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Ran {claimed} jobs'))
+
+            return
+
+        # workers are forked from the configured process and must not share its database connections
+        connections.close_all()
+
+        context  = multiprocessing.get_context('fork')
+        stopping = context.Event()
+        workers  = [
+            context.Process(target = work, args = (options['batch_size'], options['poll_interval'], stopping), daemon = True)
+            for _ in range(options['processes'])
+        ]
+
+        for worker in workers:
+            worker.start()
+
+        self.stdout.write(f'Started {len(workers)} job workers')
+
+        try:
+            while all(worker.is_alive() for worker in workers):
+                time.sleep(1)
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            stopping.set()
+
+            for worker in workers:
+                worker.join()
+
+        self.stdout.write(self.style.SUCCESS('Job workers stopped'))
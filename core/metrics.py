@@ -0,0 +1,266 @@
+import asyncio, atexit, bisect, fcntl, glob, json, os, tempfile, threading, time
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# counts of processes that exited, folded into one snapshot
+RETIRED_SNAPSHOT = 'metrics-retired.json'
+
+def label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+def format_labels(labels, extra = ()):
+    pairs = list(labels) + list(extra)
+
+    if not pairs:
+        return ''
+
+    return '{%s}' % ','.join('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"')) for name, value in pairs)
+
+def merge_snapshots(snapshots):
+    counters   = {}
+    histograms = {}
+
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key           = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+
+        for name, labels, buckets, counts, total in snapshot['histograms']:
+            key       = (name, tuple(map(tuple, labels)))
+            histogram = histograms.setdefault(key, {'buckets' : buckets, 'counts' : [0] * len(counts), 'sum' : 0.0})
+            histogram['counts'] = [current + count for current, count in zip(histogram['counts'], counts)]
+            histogram['sum']   += total
+
+    return counters, histograms
+
+def load_snapshot(path):
+    try:
+        with open(path) as snapshot_file:
+            return json.load(snapshot_file)
+
+    except (OSError, ValueError):
+        return None
+
+def snapshot_pid(path):
+    # metrics-<pid>-<start>.json, the start keeps a reused pid from overwriting an older file
+    try:
+        return int(os.path.basename(path).split('-')[1].split('.')[0])
+
+    except (IndexError, ValueError):
+        return None
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+
+    except ProcessLookupError:
+        return False
+
+    except PermissionError:
+        pass
+
+    return True
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms exported in the Prometheus text format.
+
+    When ``directory`` is set every process periodically writes its own snapshot
+    there and ``render()`` sums the snapshots of all processes. Snapshots of exited
+    processes are folded into ``RETIRED_SNAPSHOT``, so counters never go down.
+    A forked child starts from zero, its parent keeps reporting what it counted.
+    """
+    def __init__(self, directory = None, flush_interval = 5):
+        self.directory      = directory
+        self.flush_interval = flush_interval
+        self.lock           = threading.Lock()
+        self.counters       = {}
+        self.histograms     = {}
+        self.last_flush     = time.monotonic()
+        self.started        = time.time_ns()
+
+    def inc(self, name, labels = None, amount = 1):
+        key = (name, label_key(labels))
+
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+        self.maybe_flush()
+
+    def observe(self, name, value, labels = None, buckets = DEFAULT_BUCKETS):
+        key = (name, label_key(labels))
+
+        with self.lock:
+            histogram = self.histograms.get(key)
+
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets' : list(buckets), 'counts' : [0] * (len(buckets) + 1), 'sum' : 0.0}
+
+            histogram['counts'][bisect.bisect_left(histogram['buckets'], value)] += 1
+            histogram['sum'] += value
+
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters'   : [[name, labels, value] for (name, labels), value in self.counters.items()],
+                'histograms' : [
+                    [name, labels, histogram['buckets'], list(histogram['counts']), histogram['sum']]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def maybe_flush(self):
+        if self.directory and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if not self.directory:
+            return
+
+        self.last_flush = time.monotonic()
+        os.makedirs(self.directory, exist_ok = True)
+
+        self.write_snapshot(f'metrics-{os.getpid()}-{self.started}.json', self.snapshot())
+
+    def write_snapshot(self, name, snapshot):
+        descriptor, path = tempfile.mkstemp(dir = self.directory, prefix = '.metrics-')
+
+        with os.fdopen(descriptor, 'w') as snapshot_file:
+            json.dump(snapshot, snapshot_file)
+
+        os.replace(path, os.path.join(self.directory, name))
+
+    def retire_exited(self):
+        """
+        Adds the snapshots of exited processes to ``RETIRED_SNAPSHOT`` and removes them,
+        under a file lock, so concurrent collectors fold every snapshot exactly once.
+        """
+        with open(os.path.join(self.directory, '.retire.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            exited = [
+                path for path in glob.glob(os.path.join(self.directory, 'metrics-*.json'))
+                if snapshot_pid(path) is not None and not is_running(snapshot_pid(path))
+            ]
+
+            if not exited:
+                return
+
+            snapshots            = [load_snapshot(path) for path in [os.path.join(self.directory, RETIRED_SNAPSHOT)] + exited]
+            counters, histograms = merge_snapshots(snapshot for snapshot in snapshots if snapshot is not None)
+
+            self.write_snapshot(RETIRED_SNAPSHOT, {
+                'counters'   : [[name, labels, value] for (name, labels), value in counters.items()],
+                'histograms' : [
+                    [name, labels, histogram['buckets'], histogram['counts'], histogram['sum']]
+                    for (name, labels), histogram in histograms.items()
+                ],
+            })
+
+            for path in exited:
+                os.remove(path)
+
+    def collect(self):
+        if not self.directory:
+            return [self.snapshot()]
+
+        self.flush()
+        self.retire_exited()
+
+        snapshots = [load_snapshot(path) for path in glob.glob(os.path.join(self.directory, 'metrics-*.json'))]
+
+        return [snapshot for snapshot in snapshots if snapshot is not None]
+
+    def render(self):
+        counters, histograms = merge_snapshots(self.collect())
+        lines                = []
+
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f'# TYPE {name} counter')
+            lines.extend(
+                f'{name}{format_labels(labels)} {value}'
+                for (metric, labels), value in sorted(counters.items()) if metric == name
+            )
+
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f'# TYPE {name} histogram')
+
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+
+                cumulative = 0
+                for bound, count in zip(histogram['buckets'] + ['+Inf'], histogram['counts']):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{format_labels(labels, [("le", bound)])} {cumulative}')
+
+                lines.append(f'{name}_sum{format_labels(labels)} {histogram["sum"]}')
+                lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def after_fork(self):
+        # the parent's lock may have been held by one of its other threads
+        self.lock       = threading.Lock()
+        self.counters   = {}
+        self.histograms = {}
+        self.last_flush = time.monotonic()
+        self.started    = time.time_ns()
+
+metrics = MetricsRegistry(directory = settings.METRICS_DIR, flush_interval = settings.METRICS_FLUSH_INTERVAL)
+
+atexit.register(metrics.flush)
+os.register_at_fork(after_in_child = metrics.after_fork)
+
+class MetricsMiddleware:
+    """
+    Records request latency per URL pattern together with the query count and
+    DB time collected by QueryBudgetMiddleware.
+    """
+    sync_capable  = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        started  = time.perf_counter()
+        response = self.get_response(request)
+
+        return self.record(request, response, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        started  = time.perf_counter()
+        response = await self.get_response(request)
+
+        return self.record(request, response, time.perf_counter() - started)
+
+    def record(self, request, response, elapsed):
+        resolver_match = getattr(request, 'resolver_match', None)
+        labels         = {'route' : resolver_match.route if resolver_match else 'unmatched', 'method' : request.method}
+
+        metrics.observe('http_request_duration_seconds', elapsed, labels)
+        metrics.inc('http_requests_total', dict(labels, status = str(response.status_code)))
+
+        query_stats = getattr(request, 'query_stats', None)
+
+        if query_stats is not None:
+            metrics.inc('db_queries_total', labels, query_stats.count)
+            metrics.inc('db_query_duration_seconds_total', labels, query_stats.duration)
+
+        return response
@@ -0,0 +1,31 @@
+from django.db                  import models
+from django.db.models.functions import Cast
+
+# ALTER COLUMN ... TYPE casts every stored date to a datetime at midnight
+CONVERTED_BY_ALTER = ('postgresql', 'mysql', 'oracle')
+
+def convert_dates_to_datetimes(app_label, model_names, field_name = 'updated_at'):
+    """
+    Returns a RunPython function, run after an AlterField from DateField to DateTimeField,
+    that leaves every stored value of ``field_name`` readable as a datetime. Vendors
+    this was not worked out for raise instead of silently keeping unreadable values.
+    """
+    def convert(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+
+        if vendor in CONVERTED_BY_ALTER:
+            return
+
+        # djongo writes dates as BSON datetimes at midnight, which a DateTimeField reads as is
+        if vendor == 'djongo':
+            return
+
+        if vendor != 'sqlite':
+            raise NotImplementedError(f'Converting stored dates to datetimes is not implemented for {vendor}')
+
+        # SQLite copies the old 'YYYY-MM-DD' text into the rebuilt table, which a DateTimeField reads back as None
+        for model_name in model_names:
+            model = apps.get_model(app_label, model_name)
+            model.objects.using(schema_editor.connection.alias).update(**{field_name : Cast(field_name, models.DateTimeField())})
+
+    return convert
@@ -1,8 +1,31 @@
-from django.db import models
+from django.db    import models
+from django.utils import timezone
 
 class TimeStampModel(models.Model):
     created_at = models.DateField(auto_now_add=True)
-    updated_at = models.DateField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+class Job(TimeStampModel):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED  = 'failed'
+
+    STATES = [(PENDING, PENDING), (RUNNING, RUNNING), (FAILED, FAILED)]
+
+    kind       = models.CharField(max_length=50)
+    payload    = models.TextField(default='{}')
+    state      = models.CharField(max_length=10, choices=STATES, default=PENDING)
+    attempts   = models.PositiveIntegerField(default=0)
+    run_at     = models.DateTimeField(default=timezone.now)
+    locked_by  = models.CharField(max_length=100, blank=True)
+    locked_at  = models.DateTimeField(null=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        db_table = 'jobs'
+        indexes  = [
+            models.Index(fields=['state', 'run_at', 'id'], name='jobs_state_run_at_idx'),
+        ]
@@ -0,0 +1,176 @@
+import asyncio, logging, random, re, time
+
+from collections  import Counter
+from contextlib   import ExitStack, contextmanager
+from contextvars  import ContextVar
+
+from django.conf  import settings
+from django.db    import connections
+
+logger            = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('core.slow_query')
+
+STRING_LITERAL  = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL  = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_SET = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+TRANSACTION_SQL = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+current_recorder = ContextVar('current_recorder', default = None)
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+def normalize_sql(sql):
+    """
+    Reduces a statement to its shape: literals become ``?`` and ``IN`` lists collapse to one element.
+    """
+    shape = STRING_LITERAL.sub('?', sql)
+    shape = NUMBER_LITERAL.sub('?', shape)
+    shape = shape.replace('%s', '?')
+
+    return PLACEHOLDER_SET.sub('(?)', shape)
+
+class QueryRecorder:
+    def __init__(self):
+        self.count     = 0
+        self.duration  = 0.0
+        self.shapes    = Counter()
+        self.view_name = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(TRANSACTION_SQL):
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+
+        finally:
+            duration       = time.perf_counter() - started
+            shape          = normalize_sql(sql)
+            self.count    += 1
+            self.duration += duration
+            self.shapes[shape] += 1
+
+            if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS and random.random() < settings.SLOW_QUERY_SAMPLE_RATE:
+                slow_query_logger.warning('slow query', extra = {
+                    'view'        : self.view_name,
+                    'shape'       : shape,
+                    'duration_ms' : round(duration * 1000, 3),
+                    'database'    : context['connection'].alias,
+                })
+
+    def repeated_shapes(self, threshold = None):
+        threshold = threshold or settings.QUERY_BUDGET_N_PLUS_ONE_THRESHOLD
+
+        return [shape for shape, count in self.shapes.items() if count >= threshold]
+
+@contextmanager
+def recording_into(recorder):
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+
+        yield recorder
+
+@contextmanager
+def record_queries():
+    recorder = QueryRecorder()
+    token    = current_recorder.set(recorder)
+
+    try:
+        with recording_into(recorder):
+            yield recorder
+
+    finally:
+        current_recorder.reset(token)
+
+def get_view_name(view_class, method):
+    return f'{view_class.__module__}.{view_class.__qualname__}.{method.lower()}'
+
+def get_query_budget(view_class, method):
+    """
+    Reads the ``query_budget`` a view class declares, either one number for every
+    method or a dict keyed by lower-case HTTP method.
+    """
+    budget = getattr(view_class, 'query_budget', None)
+
+    if isinstance(budget, dict):
+        return budget.get(method.lower())
+
+    return budget
+
+def check_query_budget(view_name, budget, recorder):
+    violations = []
+
+    if budget is not None and recorder.count > budget:
+        violations.append(f'{view_name} ran {recorder.count} queries, budget is {budget}')
+
+    for shape in recorder.repeated_shapes():
+        violations.append(f'{view_name} repeated {recorder.shapes[shape]} times (possible N+1): {shape}')
+
+    return violations
+
+class QueryBudgetMiddleware:
+    """
+    Counts queries and DB time per request and reports views that exceed their
+    declared ``query_budget`` or repeat one query shape (N+1).
+    Queries run while a streaming response is consumed are not counted.
+
+    Under ASGI the recorder is only published in ``current_recorder``; the
+    database executor installs it on the connections of its worker threads.
+    """
+    sync_capable  = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        with record_queries() as recorder:
+            request.query_stats = recorder
+            response            = self.get_response(request)
+
+        return self.check_budget(request, response, recorder)
+
+    async def __acall__(self, request):
+        recorder            = QueryRecorder()
+        token               = current_recorder.set(recorder)
+        request.query_stats = recorder
+
+        try:
+            response = await self.get_response(request)
+
+        finally:
+            current_recorder.reset(token)
+
+        return self.check_budget(request, response, recorder)
+
+    def check_budget(self, request, response, recorder):
+        view_class = getattr(request, 'view_class', None)
+
+        if view_class is None:
+            return response
+
+        violations = check_query_budget(recorder.view_name, get_query_budget(view_class, request.method), recorder)
+
+        if violations and settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded('\n'.join(violations))
+
+        for violation in violations:
+            logger.warning(violation)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.view_class = getattr(view_func, 'view_class', None)
+
+        if request.view_class is not None:
+            request.query_stats.view_name = get_view_name(request.view_class, request.method)
@@ -0,0 +1,118 @@
+import hashlib, json, math, threading, time
+
+from functools         import wraps
+
+from django.conf       import settings
+from django.core.cache import caches
+from django.http       import JsonResponse
+
+from core.metrics      import metrics
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR')
+
+def request_email(request):
+    try:
+        email = json.loads(request.body).get('email')
+
+    except (ValueError, AttributeError):
+        return None
+
+    return email.strip().lower() if isinstance(email, str) else None
+
+# what each bucket scope of a route is keyed by
+SCOPES = {
+    'ip'    : client_ip,
+    'email' : request_email,
+}
+
+class TokenBucketLimiter:
+    """
+    Token buckets kept in a shared cache, one per route, scope and client.
+
+    A bucket holds up to ``capacity`` tokens and refills completely in ``period``
+    seconds; every request takes one token from each bucket it belongs to and is
+    rejected while any of them is empty. Buckets are read and written back under
+    a process-local lock only, so processes sharing a cache may together let a
+    few more requests through than configured. Rejected requests only read.
+    """
+    def __init__(self, cache_alias):
+        self.cache_alias = cache_alias
+        self.lock        = threading.Lock()
+
+    def key(self, route, scope, value):
+        digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size = 16).hexdigest()
+
+        return f'ratelimit:{route}:{scope}:{digest}'
+
+    def acquire(self, route, request, now = None):
+        """
+        Takes a token for ``request`` from every bucket of ``route``. Returns ``(None, 0)``
+        when allowed, otherwise the scope of the empty bucket and the seconds until it
+        has a token again.
+        """
+        now     = time.time() if now is None else now
+        buckets = {}
+
+        for scope, (capacity, period) in settings.RATE_LIMITS.get(route, {}).items():
+            value = SCOPES[scope](request)
+
+            if value:
+                buckets[self.key(route, scope, value)] = (scope, capacity, capacity / period, period)
+
+        if not buckets:
+            return None, 0
+
+        with self.lock:
+            cache  = caches[self.cache_alias]
+            stored = cache.get_many(list(buckets))
+            tokens = {}
+            denied = (None, 0)
+
+            for key, (scope, capacity, rate, _) in buckets.items():
+                available, updated_at = stored.get(key, (capacity, now))
+                tokens[key]           = min(capacity, available + max(0, now - updated_at) * rate)
+
+                if tokens[key] < 1 and (1 - tokens[key]) / rate > denied[1]:
+                    denied = (scope, (1 - tokens[key]) / rate)
+
+            # a rejected request takes nothing, and the stored buckets refill to the same level without it
+            if denied[0] is None:
+                cache.set_many(
+                    {key : (available - 1, now) for key, available in tokens.items()},
+                    timeout = math.ceil(max(period for _, _, _, period in buckets.values()))
+                )
+
+        return denied[0], math.ceil(denied[1])
+
+rate_limiter = TokenBucketLimiter(settings.RATE_LIMIT_CACHE)
+
+def rate_limit(route, cost = None):
+    """
+    Rejects requests to the decorated view with ``429 Too Many Requests`` once a bucket
+    of ``route`` in ``RATE_LIMITS`` is empty. ``cost`` returns the seconds of work a
+    request takes, which is counted as saved for every rejected one.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            scope, retry_after = rate_limiter.acquire(route, request)
+
+            if scope is None:
+                metrics.inc('rate_limit_requests_total', {'route' : route, 'result' : 'allowed'})
+
+                return view(request, *args, **kwargs)
+
+            metrics.inc('rate_limit_requests_total', {'route' : route, 'result' : f'throttled_{scope}'})
+
+            if cost is not None:
+                metrics.inc('rate_limit_saved_seconds_total', {'route' : route}, cost())
+
+            response                = JsonResponse({'MESSAGE' : 'TOO_MANY_REQUESTS'}, status = 429)
+            response['Retry-After'] = max(1, retry_after)
+
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,31 @@
+import json
+
+from django.conf                  import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http                  import HttpResponse
+from django.utils.module_loading  import import_string
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def stdlib_dumps(data):
+    return json.dumps(data, cls = DjangoJSONEncoder, separators = (',', ':')).encode('utf-8')
+
+def fast_dumps(data):
+    if orjson is None:
+        return stdlib_dumps(data)
+
+    return orjson.dumps(data)
+
+def render_json(data):
+    return import_string(settings.JSON_RENDERER)(data)
+
+class FastJsonResponse(HttpResponse):
+    """
+    JsonResponse counterpart that encodes ``data`` with the callable named by ``JSON_RENDERER``.
+    """
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content = render_json(data), **kwargs)
@@ -0,0 +1,163 @@
+import asyncio, itertools, threading, time
+
+from contextlib    import contextmanager
+from contextvars   import ContextVar
+
+from django.conf   import settings
+from django.db     import DEFAULT_DB_ALIAS, connections
+
+PRIMARY = DEFAULT_DB_ALIAS
+
+# app label of the models DatabaseCache queries through
+DATABASE_CACHE_APP_LABEL = 'django_cache'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# set while a view that declares ``replica_reads`` handles a request
+reads_from_replica = ContextVar('reads_from_replica', default = False)
+
+@contextmanager
+def use_primary():
+    token = reads_from_replica.set(False)
+
+    try:
+        yield
+
+    finally:
+        reads_from_replica.reset(token)
+
+class ReplicaSelector:
+    """
+    Picks the replica of a read, either in turn (``round_robin``) or the one with the
+    lowest moving average query time (``least_latency``). Replicas without a
+    measurement yet count as fastest, so each of them gets tried.
+    """
+    smoothing = 0.2
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.lock     = threading.Lock()
+        self.turns    = itertools.count()
+        self.latency  = {}
+
+    def choose(self, replicas):
+        if self.strategy == 'least_latency':
+            return min(replicas, key = lambda alias : self.latency.get(alias, 0.0))
+
+        return replicas[next(self.turns) % len(replicas)]
+
+    def observe(self, alias, duration):
+        with self.lock:
+            previous            = self.latency.get(alias)
+            self.latency[alias] = duration if previous is None else previous + self.smoothing * (duration - previous)
+
+    def reset(self):
+        with self.lock:
+            self.turns   = itertools.count()
+            self.latency = {}
+
+replica_selector = ReplicaSelector(settings.DATABASE_REPLICA_SELECTION)
+
+def measure_latency(execute, sql, params, many, context):
+    started = time.perf_counter()
+
+    try:
+        return execute(sql, params, many, context)
+
+    finally:
+        replica_selector.observe(context['connection'].alias, time.perf_counter() - started)
+
+def install_latency_wrapper(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver timing every query sent to a replica.
+    """
+    if connection.alias in settings.DATABASE_REPLICAS and measure_latency not in connection.execute_wrappers:
+        connection.execute_wrappers.append(measure_latency)
+
+class PrimaryReplicaRouter:
+    """
+    Sends writes to the primary and reads to a replica while ``reads_from_replica`` is set.
+    Reads inside a transaction on the primary stay there, so they see its writes, and
+    database cache entries are always read from the primary they were written to.
+    """
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+
+        if not replicas or not reads_from_replica.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+
+        if model._meta.app_label == DATABASE_CACHE_APP_LABEL:
+            return PRIMARY
+
+        return replica_selector.choose(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, model_name = None, **hints):
+        # replicas receive the schema through replication
+        return db not in settings.DATABASE_REPLICAS
+
+def is_pinned_to_primary(request):
+    try:
+        return float(request.COOKIES[settings.READ_YOUR_WRITES_COOKIE]) > time.time()
+
+    except (KeyError, ValueError):
+        return False
+
+def get_replica_reads(view_class):
+    return [method.upper() for method in getattr(view_class, 'replica_reads', ())]
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets views read from replicas for the methods listed in their ``replica_reads``.
+
+    A successful unsafe request sets a cookie that pins the client's reads to the
+    primary for ``READ_YOUR_WRITES_WINDOW`` seconds, longer than replicas are
+    expected to lag, so authors see their own writes straight away.
+    """
+    sync_capable  = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        with use_primary():
+            response = self.get_response(request)
+
+        return self.pin_writer(request, response)
+
+    async def __acall__(self, request):
+        with use_primary():
+            response = await self.get_response(request)
+
+        return self.pin_writer(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+
+        if request.method in get_replica_reads(view_class) and not is_pinned_to_primary(request):
+            reads_from_replica.set(True)
+
+    def pin_writer(self, request, response):
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS and response.status_code < 400:
+            window = settings.READ_YOUR_WRITES_WINDOW
+
+            response.set_cookie(settings.READ_YOUR_WRITES_COOKIE, str(time.time() + window), max_age = window, httponly = True)
+
+        return response
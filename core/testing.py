@@ -0,0 +1,23 @@
+from urllib.parse   import urlparse
+
+from django.urls    import resolve
+
+from core.queries   import check_query_budget, get_query_budget, record_queries
+
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin asserting that a request stays within the ``query_budget``
+    of the view it resolves to and does not repeat a query shape.
+    """
+    def assertQueryBudget(self, method, path, *args, **kwargs):
+        view_class = resolve(urlparse(path).path).func.view_class
+        budget     = get_query_budget(view_class, method)
+
+        self.assertIsNotNone(budget, f'{view_class.__name__} declares no query budget for {method.upper()}')
+
+        with record_queries() as recorder:
+            response = getattr(self.client, method.lower())(path, *args, **kwargs)
+
+        self.assertEqual(check_query_budget(view_class.__name__, budget, recorder), [])
+
+        return response
@@ -1,3 +1,551 @@
-from django.test import TestCase
+import gzip, json, jwt, os, subprocess, sys, tempfile, threading, time
 
-# Create your tests here.
+from django.conf           import settings
+from django.core.cache     import caches
+from django.db             import connection, connections
+from django.http           import HttpResponse
+from asgiref.sync          import async_to_sync
+from asgiref.testing       import ApplicationCommunicator
+from django.test           import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils     import CaptureQueriesContext
+from unittest              import skipUnless
+from unittest.mock         import Mock, patch
+
+from core.asgi             import AsyncURLConfASGIHandler, DatabaseExecutor
+from core.compression      import CompressionMiddleware, cache_compressed, compressed_key
+from core.jobs             import JOB_HANDLERS, claim_jobs, enqueue, run_jobs, run_pending_jobs
+from core.log              import JsonLinesFormatter
+from core.metrics          import MetricsRegistry, metrics
+from core.migrations_utils import convert_dates_to_datetimes
+from core.models           import Job
+from core.queries          import QueryBudgetExceeded, QueryBudgetMiddleware, normalize_sql, slow_query_logger
+from core.ratelimit        import TokenBucketLimiter
+from core.routers          import ReplicaRoutingMiddleware, ReplicaSelector, reads_from_replica, replica_selector
+from postings.cache        import get_posting_info
+from postings.counters     import view_counter
+from postings.models       import Category, Comment, Posting
+from postings.trending     import trending_counter
+from postings.unique_views import unique_view_counter
+from users.models          import User
+
+class BudgetedView:
+    query_budget = {'get' : 1}
+
+def run_queries(count):
+    def get_response(request):
+        middleware.process_view(request, type('view', (), {'view_class' : BudgetedView}), (), {})
+
+        with connection.cursor() as cursor:
+            for value in range(count):
+                cursor.execute('SELECT %s', [value])
+
+        return HttpResponse()
+
+    middleware = QueryBudgetMiddleware(get_response)
+
+    return middleware
+
+class NormalizeSqlTest(SimpleTestCase):
+    def test_normalize_sql_replaces_literals(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM users WHERE id = 3 AND name = 'kim' AND id IN (%s, %s, %s)"),
+            'SELECT * FROM users WHERE id = ? AND name = ? AND id IN (?)'
+        )
+
+class ConvertDatesToDatetimesTest(SimpleTestCase):
+    def schema_editor(self, vendor):
+        return Mock(connection = Mock(vendor = vendor, alias = 'default'))
+
+    def test_vendors_converted_by_alter_are_left_alone(self):
+        apps    = Mock()
+        convert = convert_dates_to_datetimes('postings', ('posting',))
+
+        for vendor in ('postgresql', 'mysql', 'oracle', 'djongo'):
+            convert(apps, self.schema_editor(vendor))
+
+        apps.get_model.assert_not_called()
+
+    def test_unknown_vendor_raises(self):
+        convert = convert_dates_to_datetimes('postings', ('posting',))
+
+        with self.assertRaises(NotImplementedError):
+            convert(Mock(), self.schema_editor('cockroachdb'))
+
+class QueryBudgetMiddlewareTest(TestCase):
+    def request(self, count):
+        request = RequestFactory().get('/')
+
+        run_queries(count)(request)
+
+        return request
+
+    @override_settings(QUERY_BUDGET_RAISE = True)
+    def test_query_budget_within_budget(self):
+        request = self.request(1)
+
+        self.assertEqual(request.query_stats.count, 1)
+
+    @override_settings(QUERY_BUDGET_RAISE = True)
+    def test_query_budget_exceeded_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.request(3)
+
+    def test_query_budget_exceeded_logs(self):
+        with self.assertLogs('core.queries', level = 'WARNING') as logs:
+            self.request(3)
+
+        self.assertIn('budget is 1', logs.output[0])
+        self.assertIn('possible N+1', logs.output[1])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS = 0, SLOW_QUERY_SAMPLE_RATE = 1.0)
+    def test_slow_query_logged_with_view_and_shape(self):
+        with self.assertLogs('core.slow_query', level = 'WARNING') as logs:
+            self.request(1)
+
+        entry = json.loads(JsonLinesFormatter().format(logs.records[0]))
+
+        self.assertEqual(entry['view'], 'core.tests.BudgetedView.get')
+        self.assertEqual(entry['shape'], 'SELECT ?')
+        self.assertEqual(entry['database'], 'default')
+        self.assertIn('duration_ms', entry)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS = 0, SLOW_QUERY_SAMPLE_RATE = 0)
+    def test_slow_query_sampled_out(self):
+        with patch.object(slow_query_logger, 'warning') as warning:
+            self.request(1)
+
+        warning.assert_not_called()
+
+@override_settings(RATE_LIMITS = {'signin' : {'ip' : (2, 10)}})
+class TokenBucketLimiterTest(SimpleTestCase):
+    def tearDown(self):
+        caches[settings.RATE_LIMIT_CACHE].clear()
+
+    def test_bucket_refills_over_time(self):
+        limiter = TokenBucketLimiter(settings.RATE_LIMIT_CACHE)
+        request = RequestFactory().post('/', REMOTE_ADDR = '10.0.0.1')
+
+        self.assertEqual(limiter.acquire('signin', request, now = 100), (None, 0))
+        self.assertEqual(limiter.acquire('signin', request, now = 100), (None, 0))
+        self.assertEqual(limiter.acquire('signin', request, now = 101), ('ip', 4))
+        self.assertEqual(limiter.acquire('signin', request, now = 105), (None, 0))
+        self.assertEqual(limiter.acquire('signin', request, now = 105), ('ip', 5))
+        self.assertEqual(limiter.acquire('signup', request, now = 105), (None, 0))
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        self.batches = []
+
+    def handle(self, payloads):
+        self.batches.append(payloads)
+
+    def fail(self, payloads):
+        raise ValueError('broken')
+
+    def fail_on_two(self, payloads):
+        if {'number' : 2} in payloads:
+            raise ValueError('broken')
+
+        self.batches.append(payloads)
+
+    def test_jobs_of_a_kind_run_as_one_batch(self):
+        with patch.dict(JOB_HANDLERS, {'test' : self.handle}):
+            enqueue('test', number = 1)
+            enqueue('test', number = 2)
+
+            self.assertEqual(run_pending_jobs(), 2)
+
+        self.assertEqual(self.batches, [[{'number' : 1}, {'number' : 2}]])
+        self.assertFalse(Job.objects.exists())
+
+    def test_claimed_jobs_are_not_claimed_again(self):
+        enqueue('test', number = 1)
+
+        self.assertEqual(len(claim_jobs('worker-1', 10)), 1)
+        self.assertEqual(claim_jobs('worker-2', 10), [])
+
+    @override_settings(JOB_MAX_ATTEMPTS = 2, JOB_RETRY_BACKOFF = 0)
+    def test_failed_jobs_retry_until_max_attempts(self):
+        with patch.dict(JOB_HANDLERS, {'test' : self.fail}), self.assertLogs('core.jobs', level = 'ERROR'):
+            job = enqueue('test', number = 1)
+
+            self.assertEqual(run_pending_jobs(), 2)
+
+        job.refresh_from_db()
+
+        self.assertEqual(job.state, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(job.last_error, "ValueError('broken')")
+
+    def test_retry_waits_for_backoff(self):
+        with patch.dict(JOB_HANDLERS, {'test' : self.fail}), self.assertLogs('core.jobs', level = 'ERROR'):
+            job = enqueue('test', number = 1)
+
+            self.assertEqual(run_pending_jobs(), 1)
+
+        job.refresh_from_db()
+
+        self.assertEqual(job.state, Job.PENDING)
+        self.assertEqual(claim_jobs('worker-1', 10), [])
+
+    def test_failed_batch_only_retries_the_failing_job(self):
+        with patch.dict(JOB_HANDLERS, {'test' : self.fail_on_two}), self.assertLogs('core.jobs', level = 'WARNING'):
+            jobs = [enqueue('test', number = number) for number in range(1, 4)]
+
+            self.assertEqual(run_pending_jobs(), 3)
+
+        self.assertEqual(self.batches, [[{'number' : 1}], [{'number' : 3}]])
+        self.assertEqual(list(Job.objects.values_list('id', 'state', 'attempts', 'last_error')), [
+            (jobs[1].id, Job.PENDING, 1, "ValueError('broken')"),
+        ])
+
+    def test_reclaimed_batch_is_skipped(self):
+        enqueue('test', number = 1)
+        enqueue('test', number = 2)
+
+        batch = claim_jobs('worker-1', 10)
+
+        # the lock expired and another worker took the second job
+        Job.objects.filter(id = batch[1].id).update(locked_by = 'worker-2')
+
+        with patch.dict(JOB_HANDLERS, {'test' : self.handle}), self.assertLogs('core.jobs', level = 'WARNING'):
+            run_jobs('test', batch)
+
+        self.assertEqual(self.batches, [])
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_unknown_kind_fails_without_retry(self):
+        job = enqueue('unknown')
+
+        with self.assertLogs('core.jobs', level = 'ERROR'):
+            run_pending_jobs()
+
+        job.refresh_from_db()
+
+        self.assertEqual(job.state, Job.FAILED)
+        self.assertEqual(job.attempts, 1)
+
+class ReplicaReadView:
+    replica_reads = ('get',)
+
+def route_reads(method, cookies = None, status = 200):
+    """
+    Sends a request through ReplicaRoutingMiddleware and returns the database a
+    posting read would use, together with the response.
+    """
+    databases = []
+
+    def get_response(request):
+        middleware.process_view(request, type('view', (), {'view_class' : ReplicaReadView}), (), {})
+        databases.append(Posting.objects.all().db)
+
+        return HttpResponse(status = status)
+
+    middleware = ReplicaRoutingMiddleware(get_response)
+    request    = getattr(RequestFactory(), method.lower())('/')
+
+    request.COOKIES.update(cookies or {})
+    response = middleware(request)
+
+    return databases[0], response
+
+@override_settings(DATABASE_REPLICAS = ['replica1', 'replica2'], DATABASE_REPLICA_SELECTION = 'round_robin')
+class ReplicaRoutingTest(SimpleTestCase):
+    def setUp(self):
+        replica_selector.reset()
+
+    def test_reads_rotate_over_replicas(self):
+        self.assertEqual([route_reads('GET')[0] for _ in range(3)], ['replica1', 'replica2', 'replica1'])
+        self.assertFalse(reads_from_replica.get())
+        self.assertEqual(Posting.objects.all().db, 'default')
+
+    def test_writes_pin_reads_to_primary(self):
+        database, response = route_reads('POST', status = 201)
+        cookie             = response.cookies[settings.READ_YOUR_WRITES_COOKIE]
+
+        self.assertEqual(database, 'default')
+        self.assertEqual(cookie['max-age'], settings.READ_YOUR_WRITES_WINDOW)
+        self.assertEqual(route_reads('GET', {settings.READ_YOUR_WRITES_COOKIE : cookie.value})[0], 'default')
+        self.assertEqual(route_reads('GET', {settings.READ_YOUR_WRITES_COOKIE : str(time.time() - 1)})[0], 'replica1')
+        self.assertNotIn(settings.READ_YOUR_WRITES_COOKIE, route_reads('POST', status = 400)[1].cookies)
+
+    def test_cache_misses_load_from_primary(self):
+        def load(posting_id):
+            return Posting.objects.all().db, 1
+
+        token = reads_from_replica.set(True)
+
+        try:
+            self.assertEqual(Posting.objects.all().db, 'replica1')
+            self.assertEqual(get_posting_info(1, 1, load), 'default')
+
+        finally:
+            reads_from_replica.reset(token)
+            caches['postings'].clear()
+
+    def test_least_latency_prefers_fastest_replica(self):
+        selector = ReplicaSelector('least_latency')
+
+        self.assertEqual(selector.choose(['replica1', 'replica2']), 'replica1')
+
+        selector.observe('replica1', 0.2)
+        selector.observe('replica2', 0.05)
+
+        self.assertEqual(selector.choose(['replica1', 'replica2']), 'replica2')
+
+        selector.observe('replica2', 1.2)
+
+        self.assertEqual(selector.choose(['replica1', 'replica2']), 'replica1')
+
+@skipUnless(settings.DATABASE_REPLICAS, 'needs a replica alias, e.g. a TEST MIRROR of default')
+class ReplicaReadYourWritesTest(TransactionTestCase):
+    databases = {'default', *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        access_token = jwt.encode({'id' : 1}, settings.SECRET_KEY, algorithm = settings.ALGORITHM)
+        self.headers = {'HTTP_Authorization' : access_token}
+
+        User.objects.create(id = 1, name = 'kylee', email = 'kylee@gmail.com', password = 'kylee11!')
+        Category.objects.create(id = 1, name = '테스트 카테고리1')
+        Posting.objects.create(id = 1, title = '테스트 타이틀', content = '테스트 내용', category_id = 1, user_id = 1)
+
+    def tearDown(self):
+        view_counter.reset()
+        unique_view_counter.reset()
+        trending_counter.reset()
+        caches['postings'].clear()
+
+    def replica_queries(self, client, path):
+        with CaptureQueriesContext(connections[settings.DATABASE_REPLICAS[0]]) as context:
+            response = client.get(path)
+
+        return response, len(context.captured_queries)
+
+    def test_author_reads_own_comment_from_primary(self):
+        author, reader = Client(), Client()
+
+        author.post('/postings/comments/1', json.dumps({'content' : '댓글'}), content_type = 'application/json', **self.headers)
+
+        response, replica_queries = self.replica_queries(author, '/postings/comments/1')
+
+        self.assertEqual(replica_queries, 0)
+        self.assertEqual(len(response.json()['comment_list']), 1)
+
+        _, replica_queries = self.replica_queries(reader, '/postings/comments/1')
+
+        self.assertGreater(replica_queries, 0)
+        self.assertEqual(Comment.objects.count(), 1)
+
+def compress_response(content, accept_encoding = 'gzip', status = 200, cached = False):
+    def get_response(request):
+        response = HttpResponse(content, content_type = 'application/json', status = status)
+        response['ETag'] = '"1-0-0"'
+
+        return cache_compressed(response) if cached else response
+
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING = accept_encoding)
+
+    return CompressionMiddleware(get_response)(request)
+
+class CompressionMiddlewareTest(SimpleTestCase):
+    content = json.dumps({'posting_list' : [{'content' : '게시글 내용 ' * 20}] * 20}).encode('utf-8')
+
+    def tearDown(self):
+        caches[settings.COMPRESSION_CACHE].clear()
+
+    def test_compresses_large_response(self):
+        response = compress_response(self.content, 'br;q=0, gzip;q=0.8')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"1-0-0"')
+        self.assertEqual(gzip.decompress(response.content), self.content)
+
+    def test_skips_small_error_and_unaccepted_responses(self):
+        self.assertFalse(compress_response(b'{"message":"SUCCESS"}').has_header('Content-Encoding'))
+        self.assertFalse(compress_response(self.content, status = 404).has_header('Content-Encoding'))
+        self.assertFalse(compress_response(self.content, 'identity').has_header('Content-Encoding'))
+        self.assertFalse(compress_response(self.content, 'gzip;q=0').has_header('Content-Encoding'))
+
+    def test_cached_response_reuses_compressed_bytes(self):
+        first = compress_response(self.content, cached = True)
+
+        with patch('core.compression.gzip_compress') as gzip_compress:
+            second = compress_response(self.content, cached = True)
+
+        gzip_compress.assert_not_called()
+        self.assertEqual(second.content, first.content)
+        self.assertIsNone(caches['default'].get(compressed_key('gzip', self.content)))
+
+class MetricsRegistryTest(SimpleTestCase):
+    def test_render_counters_and_histograms(self):
+        registry = MetricsRegistry()
+
+        registry.inc('requests_total', {'route' : 'postings'})
+        registry.inc('requests_total', {'route' : 'postings'})
+        registry.observe('latency_seconds', 0.02, {'route' : 'postings'}, buckets = (0.01, 0.1))
+
+        self.assertEqual(registry.render().splitlines(), [
+            '# TYPE requests_total counter',
+            'requests_total{route="postings"} 2',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{route="postings",le="0.01"} 0',
+            'latency_seconds_bucket{route="postings",le="0.1"} 1',
+            'latency_seconds_bucket{route="postings",le="+Inf"} 1',
+            'latency_seconds_sum{route="postings"} 0.02',
+            'latency_seconds_count{route="postings"} 1',
+        ])
+
+    def test_render_aggregates_process_snapshots(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'metrics-1.json'), 'w') as snapshot_file:
+                json.dump({'counters' : [['requests_total', [], 3]], 'histograms' : []}, snapshot_file)
+
+            registry = MetricsRegistry(directory = directory)
+            registry.inc('requests_total', amount = 2)
+
+            self.assertIn('requests_total 5', registry.render().splitlines())
+
+    def test_render_keeps_counts_of_exited_processes(self):
+        exited = subprocess.Popen([sys.executable, '-c', ''])
+        exited.wait()
+
+        with tempfile.TemporaryDirectory() as directory:
+            registry = MetricsRegistry(directory = directory)
+
+            for start, amount, total in ((1, 3, 3), (2, 4, 7)):
+                with open(os.path.join(directory, f'metrics-{exited.pid}-{start}.json'), 'w') as snapshot_file:
+                    json.dump({'counters' : [['requests_total', [], amount]], 'histograms' : []}, snapshot_file)
+
+                self.assertIn(f'requests_total {total}', registry.render().splitlines())
+
+            self.assertEqual(
+                sorted(os.listdir(directory)),
+                ['.retire.lock', f'metrics-{os.getpid()}-{registry.started}.json', 'metrics-retired.json']
+            )
+
+    def test_forked_child_starts_empty(self):
+        metrics.inc('forked_total')
+        reader, writer = os.pipe()
+        pid            = os.fork()
+
+        if pid == 0:
+            os.write(writer, json.dumps(metrics.snapshot()).encode())
+            os._exit(0)
+
+        os.close(writer)
+        os.waitpid(pid, 0)
+
+        with os.fdopen(reader) as child:
+            self.assertEqual(json.load(child), {'counters' : [], 'histograms' : []})
+
+        metrics.reset()
+
+class MetricsViewTest(TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_metrics_view_exposes_route_latency(self):
+        client = Client()
+
+        client.get('/postings')
+        response = client.get('/metrics')
+        body     = response.content.decode('utf-8')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_requests_total{method="GET",route="postings",status="200"} 1', body)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="postings"} 1', body)
+        self.assertIn('db_queries_total{method="GET",route="postings"} 1', body)
+
+@async_to_sync
+async def asgi_get(path, query_string = b''):
+    scope        = {'type' : 'http', 'method' : 'GET', 'path' : path, 'query_string' : query_string, 'headers' : []}
+    communicator = ApplicationCommunicator(AsyncURLConfASGIHandler(), scope)
+
+    await communicator.send_input({'type' : 'http.request', 'body' : b''})
+
+    start = await communicator.receive_output()
+    body  = b''
+
+    while True:
+        message  = await communicator.receive_output()
+        body    += message.get('body', b'')
+
+        if not message.get('more_body'):
+            break
+
+    return start['status'], json.loads(body)
+
+class DatabaseExecutorStreamTest(SimpleTestCase):
+    def setUp(self):
+        self.executor = DatabaseExecutor(1)
+        self.threads  = set()
+        self.received = []
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def produce(self, count):
+        for index in range(count):
+            self.threads.add(threading.get_ident())
+
+            yield index, len(self.received)
+
+    def test_stream_yields_items_while_producing_on_one_thread(self):
+        async def consume():
+            async for item in self.executor.stream(self.produce(5), buffer = 1):
+                self.received.append(item)
+
+        async_to_sync(consume)()
+
+        self.assertEqual([index for index, _ in self.received], [0, 1, 2, 3, 4])
+        self.assertGreater(self.received[-1][1], 0)
+        self.assertEqual(len(self.threads), 1)
+
+    def test_closed_stream_stops_producer(self):
+        async def consume():
+            items = self.executor.stream(self.produce(100), buffer = 1)
+
+            async for item in items:
+                self.received.append(item)
+                break
+
+            await items.aclose()
+
+        async_to_sync(consume)()
+
+        self.assertEqual(len(self.received), 1)
+        self.assertEqual(self.executor.get_executor().submit(lambda : 'idle').result(timeout = 5), 'idle')
+
+class AsgiReadPathTest(TransactionTestCase):
+    def setUp(self):
+        metrics.reset()
+        caches['postings'].clear()
+
+        User.objects.create(id = 1, name = 'kylee', email = 'kylee@gmail.com', password = 'kylee11!')
+        Category.objects.create(id = 1, name = '테스트 카테고리1')
+        Posting.objects.create(id = 1, title = '테스트 타이틀', content = '테스트 내용', category_id = 1, user_id = 1)
+
+    def tearDown(self):
+        view_counter.reset()
+        unique_view_counter.reset()
+        trending_counter.reset()
+
+    def test_asgi_posting_detail(self):
+        status, body = asgi_get('/postings/1')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body['posting_info']['title'], '테스트 타이틀')
+
+    def test_asgi_records_queries_run_on_executor(self):
+        status, body = asgi_get('/postings')
+
+        self.assertEqual(status, 200)
+        self.assertEqual([posting['id'] for posting in body['posting_list']], [1])
+        self.assertIn('db_queries_total{method="GET",route="postings"} 1', metrics.render().splitlines())
+
+    def test_asgi_streamed_posting_list(self):
+        status, body = asgi_get('/postings', b'stream=true')
+
+        self.assertEqual(status, 200)
+        self.assertEqual([posting['id'] for posting in body['posting_list']], [1])
@@ -1,3 +1,8 @@
-from django.shortcuts import render
+from django.http  import HttpResponse
+from django.views import View
 
-# Create your views here.
+from core.metrics import metrics
+
+class MetricsView(View):
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type = 'text/plain; version=0.0.4; charset=utf-8')
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PostingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'postings'
+
+    def ready(self):
+        import postings.jobs
+        import postings.signals
@@ -0,0 +1,36 @@
+from django.core.cache import caches
+
+from core.metrics      import metrics
+from core.routers      import use_primary
+
+POSTING_CACHE = 'postings'
+
+def detail_key(posting_id, version):
+    return f'posting:{posting_id}:detail:{version}'
+
+def get_posting_info(posting_id, version, loader):
+    """
+    Read-through lookup of the serialized ``posting_info`` of a posting at ``version``,
+    the stored ``Posting.version`` the request read. Every write bumps that version, so
+    a process never serves a payload older than the row, whichever process wrote it.
+
+    ``loader`` is called on a miss and returns the payload together with the version it
+    read. Misses are loaded from the primary and cached under that version, as a lagging
+    replica would otherwise put a stale payload back after a write. Live counters are not
+    part of the cached payload.
+    """
+    cache        = caches[POSTING_CACHE]
+    posting_info = cache.get(detail_key(posting_id, version))
+
+    if posting_info is None:
+        metrics.inc('cache_requests_total', {'cache' : POSTING_CACHE, 'result' : 'miss'})
+
+        with use_primary():
+            posting_info, version = loader(posting_id)
+
+        cache.set(detail_key(posting_id, version), posting_info)
+
+    else:
+        metrics.inc('cache_requests_total', {'cache' : POSTING_CACHE, 'result' : 'hit'})
+
+    return posting_info
@@ -0,0 +1,78 @@
+import hashlib, threading, time
+
+from django.conf       import settings
+from django.db         import transaction
+
+from core.renderers    import render_json
+from core.routers      import use_primary
+from postings.models   import Category
+
+class CategoryRegistry:
+    """
+    Process-local copy of every category, used instead of per-request existence queries.
+
+    A process re-reads the categories table at most every ``check_interval`` seconds,
+    so changes made through any process are seen within that interval. Lookups in
+    between, including misses, are answered from memory. Writes in this process
+    drop the copy right away.
+    """
+    def __init__(self, check_interval = 5):
+        self.check_interval = check_interval
+        self.lock           = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        # ({id : name}, rendered listing, digest), replaced as a whole so readers never see a mix
+        self.state     = None
+        self.loaded_at = 0.0
+
+    def refresh(self):
+        state = self.state
+        now   = time.monotonic()
+
+        if state is not None and now - self.loaded_at < self.check_interval:
+            return state
+
+        with self.lock:
+            if self.state is None or now - self.loaded_at >= self.check_interval:
+                # a replica may not have a change made a moment ago yet
+                with use_primary():
+                    categories = dict(Category.objects.order_by('id').values_list('id', 'name'))
+
+                listing        = render_json({'category_list' : [{'id' : category_id, 'name' : name} for category_id, name in categories.items()]})
+                self.state     = (categories, listing, hashlib.blake2b(listing, digest_size = 8).hexdigest())
+                self.loaded_at = now
+
+            return self.state
+
+    def exists(self, category_id):
+        try:
+            category_id = int(category_id)
+
+        except (TypeError, ValueError):
+            return False
+
+        categories, _, _ = self.refresh()
+
+        return category_id in categories
+
+    def get_listing(self):
+        """
+        Returns the rendered ``category_list`` payload together with a digest of it.
+        """
+        _, listing, digest = self.refresh()
+
+        return listing, digest
+
+    def invalidate(self):
+        self.clear()
+
+        # another request may reload before this transaction commits, drop that copy afterwards
+        transaction.on_commit(self.clear)
+
+category_registry = CategoryRegistry(settings.CATEGORY_REGISTRY_CHECK_INTERVAL)
+
+def categories_etag(request):
+    _, digest = category_registry.get_listing()
+
+    return f'categories-{digest}'
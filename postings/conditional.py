@@ -0,0 +1,75 @@
+from django.db.models             import F
+from django.utils                 import timezone
+from django.views.decorators.http import condition
+
+from postings.counters            import load_views
+from postings.models              import Comment, Posting
+
+def touch_posting(posting_ids, **changes):
+    """
+    Applies ``changes`` to the postings and bumps their version and ``updated_at``
+    in the same statement, which changes the ETag of every page that shows them.
+    """
+    return Posting.objects.filter(id__in = posting_ids).update(
+        version    = F('version') + 1,
+        updated_at = timezone.now(),
+        **changes
+    )
+
+def posting_validators(request, posting_id):
+    """
+    Reads the stored version of a posting, which conditional requests are checked
+    against and cached payloads are keyed by, in one lookup with its live counters.
+    """
+    # etag_func and last_modified_func are called separately, look the posting up once per request
+    validators = getattr(request, 'posting_validators', None)
+
+    if validators is None:
+        validators = request.posting_validators = {}
+
+    if posting_id not in validators:
+        validators[posting_id] = load_views(posting_id, 'version', 'comment_count', 'updated_at', 'unique_views')
+
+    return validators[posting_id]
+
+def comment_validators(request, comment_id):
+    if getattr(request, 'comment_validators', None) is None:
+        comment = Comment.objects.filter(id = comment_id).values('posting_id', 'child_comment_count', 'updated_at').first()
+        posting = posting_validators(request, comment['posting_id']) if comment else None
+
+        request.comment_validators = (comment, posting) if posting else (None, None)
+
+    return request.comment_validators
+
+def as_aware(value):
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+def posting_etag(request, posting_id):
+    validators = posting_validators(request, posting_id)
+
+    if validators is None:
+        return None
+
+    # the body also carries the buffered views, equal only in meaning to what the version describes
+    return f'W/"{posting_id}-{validators["version"]}-{validators["comment_count"]}"'
+
+def posting_last_modified(request, posting_id):
+    validators = posting_validators(request, posting_id)
+
+    return as_aware(validators['updated_at']) if validators else None
+
+def comment_etag(request, comment_id):
+    comment, posting = comment_validators(request, comment_id)
+
+    if comment is None:
+        return None
+
+    return f'{comment["posting_id"]}-{posting["version"]}-{posting["comment_count"]}-{comment_id}-{comment["child_comment_count"]}'
+
+def comment_last_modified(request, comment_id):
+    comment, posting = comment_validators(request, comment_id)
+
+    return as_aware(max(comment['updated_at'], posting['updated_at'])) if comment else None
+
+posting_condition = condition(etag_func = posting_etag, last_modified_func = posting_last_modified)
+comment_condition = condition(etag_func = comment_etag, last_modified_func = comment_last_modified)
@@ -0,0 +1,203 @@
+import atexit, logging, os, threading, time
+
+from django.conf      import settings
+from django.db        import DatabaseError, close_old_connections
+from django.db.models import Exists
+
+from core.jobs        import enqueue
+from core.models      import Job
+from postings.models  import Posting
+
+logger = logging.getLogger(__name__)
+
+class BufferedCounter:
+    """
+    Accumulates per-key increments in process memory and hands them to ``flush_func``
+    as one batch once ``threshold`` hits were added or ``interval`` seconds went by,
+    together with the wall-clock time the first hit of the batch arrived.
+
+    When ``flush_func`` returns a job, the batch is kept in ``flushed`` until the job is
+    gone, so readers can keep counting increments that left the buffer but are not
+    stored yet. Server processes call ``start_timer`` to run a daemon thread flushing
+    keys that stop receiving hits; other processes flush on hits and at exit only.
+    """
+    def __init__(self, flush_func, threshold, interval):
+        self.flush_func = flush_func
+        self.threshold  = threshold
+        self.interval   = interval
+        self.lock       = threading.Lock()
+        self.pending    = {}
+        self.flushing   = {}
+        self.flushed    = {}
+        self.since      = None
+        self.hits       = 0
+        self.last_flush = time.monotonic()
+        self.timer_pid  = None
+
+    def add(self, key, amount = 1):
+        with self.lock:
+            # threads do not survive a fork, a forked server process starts its own
+            if self.timer_pid is not None and self.timer_pid != os.getpid():
+                self.start_timer()
+
+            if not self.pending:
+                self.since = time.time()
+
+            self.pending[key] = self.pending.get(key, 0) + amount
+            self.hits        += 1
+            is_due            = self.hits >= self.threshold or time.monotonic() - self.last_flush >= self.interval
+
+        if is_due:
+            self.flush()
+
+    def start_timer(self):
+        self.timer_pid = os.getpid()
+
+        threading.Thread(target = self.run_timer, daemon = True).start()
+
+    def run_timer(self):
+        while True:
+            wait = self.last_flush + self.interval - time.monotonic()
+
+            if wait > 0 or not self.pending:
+                time.sleep(wait if wait > 0 else self.interval)
+
+                continue
+
+            try:
+                close_old_connections()
+                self.flush()
+
+            except Exception:
+                logger.exception('Timed flush failed')
+
+    def get(self, key):
+        return self.pending.get(key, 0)
+
+    def unapplied(self, key):
+        """
+        Returns the increments of ``key`` not handed to a job yet and ``{job id : increment}``
+        of the flushed batches holding some of it, taken together under the lock.
+        """
+        with self.lock:
+            buffered = self.pending.get(key, 0) + sum(pending.get(key, 0) for pending in self.flushing.values())
+
+            return buffered, {job_id : pending[key] for job_id, pending in self.flushed.items() if key in pending}
+
+    def forget(self, job_ids):
+        with self.lock:
+            for job_id in job_ids:
+                self.flushed.pop(job_id, None)
+
+    def flush(self):
+        token = object()
+
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            since, self.since     = self.since, None
+            self.hits             = 0
+            self.last_flush       = time.monotonic()
+
+            # counted as buffered until its job is known, so no reader misses it in between
+            if pending:
+                self.flushing[token] = pending
+
+        if not pending:
+            return
+
+        try:
+            job = self.flush_func(pending, since)
+
+        except DatabaseError:
+            logger.exception('Failed to flush %d buffered keys', len(pending))
+
+            with self.lock:
+                self.flushing.pop(token, None)
+                self.since = min(since, self.since or since)
+
+                for key, amount in pending.items():
+                    self.pending[key] = self.pending.get(key, 0) + amount
+
+            return
+
+        with self.lock:
+            self.flushing.pop(token, None)
+
+            if job is not None:
+                self.flushed[job.id] = pending
+
+        self.prune()
+
+    def prune(self):
+        # batches whose job finished are stored by now, readers find them in the stored counts
+        job_ids = list(self.flushed)
+
+        if not job_ids:
+            return
+
+        try:
+            queued = set(Job.objects.filter(id__in = job_ids).values_list('id', flat = True))
+
+        except DatabaseError:
+            logger.exception('Failed to check %d flushed batches', len(job_ids))
+
+            return
+
+        self.forget(set(job_ids) - queued)
+
+    def reset(self):
+        with self.lock:
+            self.pending    = {}
+            self.flushing   = {}
+            self.flushed    = {}
+            self.since      = None
+            self.hits       = 0
+            self.last_flush = time.monotonic()
+
+def enqueue_views(pending, since):
+    """
+    Hands buffered views to a ``flush_views`` job, one insert instead of an update per posting.
+    """
+    return enqueue('flush_views', views = {str(posting_id) : delta for posting_id, delta in pending.items()})
+
+def load_views(posting_id, *fields):
+    """
+    Reads ``fields`` of a posting with its live ``views``: the stored count plus the views
+    this process still buffers or has handed to a ``flush_views`` job that did not run.
+    Whether those jobs ran is read in the same statement as the count, so a job finishing
+    in between is neither missed nor counted twice. Returns None for a missing posting.
+    """
+    buffered, flushed = view_counter.unapplied(posting_id)
+
+    row = Posting.objects.filter(id = posting_id).values(
+        'views', *fields, **{f'queued_{job_id}' : Exists(Job.objects.filter(id = job_id)) for job_id in flushed}
+    ).first()
+
+    if row is None:
+        return None
+
+    applied = [job_id for job_id in flushed if not row.pop(f'queued_{job_id}')]
+
+    view_counter.forget(applied)
+    row['views'] += buffered + sum(delta for job_id, delta in flushed.items() if job_id not in applied)
+
+    return row
+
+view_counter = BufferedCounter(
+    enqueue_views,
+    threshold = settings.VIEW_COUNT_FLUSH_THRESHOLD,
+    interval  = settings.VIEW_COUNT_FLUSH_INTERVAL
+)
+
+atexit.register(view_counter.flush)
+
+def start_flush_timers():
+    """
+    Starts the flush thread of every buffered counter. Called by the WSGI and ASGI
+    entry points, so tests and management commands never write from a background thread.
+    """
+    from postings.trending     import trending_counter
+    from postings.unique_views import unique_view_counter
+
+    for counter in (view_counter, unique_view_counter, trending_counter):
+        counter.start_timer()
@@ -0,0 +1,63 @@
+import hashlib, time
+
+from django.conf       import settings
+from django.core.cache import caches
+
+class ViewedFilter:
+    """
+    Per-user Bloom filters of viewed postings, one per time window, kept in a cache all processes share.
+
+    A posting counts as viewed while it is in the current or the previous window's
+    filter, so repeated views are ignored for one to two windows. False positives
+    (a first view not counted) stay rare while a user views far fewer postings per
+    window than ``bits / hashes``. Concurrent views by one user may both count,
+    because the filter is read and written back without a lock.
+    """
+    def __init__(self, cache_alias, bits, hashes, window):
+        self.cache_alias = cache_alias
+        self.bits        = bits
+        self.hashes      = hashes
+        self.window      = window
+
+    def key(self, user_id, window):
+        return f'viewed:{user_id}:{window}'
+
+    def positions(self, posting_id):
+        digest = hashlib.blake2b(str(posting_id).encode('utf-8'), digest_size = 8).digest()
+        first  = int.from_bytes(digest[:4], 'big')
+        second = int.from_bytes(digest[4:], 'big') | 1
+
+        return [(first + index * second) % self.bits for index in range(self.hashes)]
+
+    def contains(self, bloom, positions):
+        return all(bloom[position >> 3] & (1 << (position & 7)) for position in positions)
+
+    def seen_or_add(self, user_id, posting_id, now = None):
+        """
+        Returns True when ``user_id`` already viewed ``posting_id``, otherwise records the view.
+        """
+        now       = time.time() if now is None else now
+        cache     = caches[self.cache_alias]
+        window    = int(now // self.window)
+        current   = self.key(user_id, window)
+        filters   = cache.get_many([current, self.key(user_id, window - 1)])
+        positions = self.positions(posting_id)
+
+        if any(self.contains(bloom, positions) for bloom in filters.values()):
+            return True
+
+        bloom = bytearray(filters.get(current) or bytes(self.bits // 8))
+
+        for position in positions:
+            bloom[position >> 3] |= 1 << (position & 7)
+
+        cache.set(current, bytes(bloom), timeout = self.window * 2)
+
+        return False
+
+viewed_filter = ViewedFilter(
+    settings.VIEW_DEDUP_CACHE,
+    settings.VIEW_DEDUP_BITS,
+    settings.VIEW_DEDUP_HASHES,
+    settings.VIEW_DEDUP_WINDOW,
+)
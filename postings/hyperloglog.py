@@ -0,0 +1,60 @@
+import hashlib, math
+
+PRECISION = 12
+
+def hash_value(value):
+    """
+    64-bit hash of ``value`` used to feed sketches, stable across processes.
+    """
+    return int.from_bytes(hashlib.blake2b(str(value).encode('utf-8'), digest_size = 8).digest(), 'big')
+
+class HyperLogLog:
+    """
+    Fixed-size cardinality sketch: ``2 ** precision`` one-byte registers (4 KB at
+    the default precision) with a standard error of about ``1.04 / sqrt(2 ** precision)``.
+    Sketches of the same precision merge by taking the register-wise maximum.
+    """
+    def __init__(self, registers = None, precision = PRECISION):
+        self.precision = precision
+        self.size      = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+
+        if len(self.registers) != self.size:
+            raise ValueError(f'Expected {self.size} registers, got {len(self.registers)}')
+
+    @classmethod
+    def from_bytes(cls, data, precision = PRECISION):
+        return cls(bytes(data), precision)
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    def add_hash(self, hashed):
+        index = hashed >> (64 - self.precision)
+        rest  = hashed & ((1 << (64 - self.precision)) - 1)
+        rank  = (64 - self.precision) - rest.bit_length() + 1
+
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, value):
+        self.add_hash(hash_value(value))
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError('Cannot merge sketches of different precision')
+
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+        return self
+
+    def count(self):
+        alpha    = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / sum(2.0 ** -register for register in self.registers)
+        zeros    = self.registers.count(0)
+
+        # linear counting is more accurate while many registers are still empty
+        if estimate <= 2.5 * self.size and zeros:
+            estimate = self.size * math.log(self.size / zeros)
+
+        return int(round(estimate))
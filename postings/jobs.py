@@ -0,0 +1,77 @@
+from datetime              import date
+
+from django.db.models      import Count, F
+
+from core.jobs             import job_handler
+from postings.conditional  import touch_posting
+from postings.models       import Comment, Posting
+from postings.search       import index_posting
+from postings.unique_views import flush_unique_views
+
+@job_handler('index_posting')
+def index_postings(payloads):
+    for posting in Posting.objects.filter(id__in = {payload['posting_id'] for payload in payloads}).only('id', 'title', 'content'):
+        index_posting(posting)
+
+@job_handler('recount_comments')
+def recount_comments(payloads):
+    """
+    Sets ``comment_count`` and ``child_comment_count`` from the comments stored now,
+    so running it twice or out of order leaves the same counts.
+    """
+    posting_ids = {payload['posting_id'] for payload in payloads}
+    parent_ids  = {payload['parent_comment_id'] for payload in payloads if payload.get('parent_comment_id')}
+    touched     = set()
+    changed     = set()
+
+    postings = Posting.objects.filter(id__in = posting_ids).annotate(actual = Count('comment'))
+
+    for posting_id, stored, actual in postings.values_list('id', 'comment_count', 'actual'):
+        if stored != actual:
+            touch_posting([posting_id], comment_count = actual)
+            touched.add(posting_id)
+
+    comments = Comment.objects.filter(id__in = parent_ids).annotate(actual = Count('child_comments'))
+
+    for comment_id, posting_id, stored, actual in comments.values_list('id', 'posting_id', 'child_comment_count', 'actual'):
+        if stored != actual:
+            Comment.objects.filter(id = comment_id).update(child_comment_count = actual)
+            changed.add(posting_id)
+
+    # reply counts are shown on the posting's comment pages, their ETags and cached payloads change with its version
+    touch_posting(changed - touched)
+
+@job_handler('flush_views')
+def flush_views(payloads):
+    """
+    Adds buffered view counts. The deltas are applied in the transaction that deletes
+    the job under its claim, so neither a retried job nor one claimed again after its
+    lock expired counts them twice.
+    """
+    deltas = {}
+
+    for payload in payloads:
+        for posting_id, delta in payload['views'].items():
+            deltas[int(posting_id)] = deltas.get(int(posting_id), 0) + delta
+
+    postings_by_delta = {}
+
+    for posting_id, delta in deltas.items():
+        postings_by_delta.setdefault(delta, []).append(posting_id)
+
+    for delta, posting_ids in postings_by_delta.items():
+        Posting.objects.filter(id__in = posting_ids).update(views = F('views') + delta)
+
+@job_handler('flush_unique_views')
+def flush_unique_view_jobs(payloads):
+    """
+    Merges buffered viewers into the sketches of the day they were seen. Adding a viewer
+    to a sketch twice changes nothing, so a retried job is harmless.
+    """
+    views_by_day = {}
+
+    for payload in payloads:
+        views_by_day.setdefault(date.fromisoformat(payload['day']), []).extend(tuple(view) for view in payload['views'])
+
+    for day, views in views_by_day.items():
+        flush_unique_views(views, day)
@@ -0,0 +1,115 @@
+import json, time
+
+from django.core.management.base import BaseCommand
+from django.db                   import transaction
+
+from core.renderers              import render_json
+from postings.models             import Category, Comment, Posting
+from postings.serializers        import CHILD_COMMENT_FIELDS, COMMENT_FIELDS, POSTING_FIELDS, format_dates, project
+from users.models                import User
+
+class Rollback(Exception):
+    pass
+
+def legacy_posting_list():
+    return json.dumps({'posting_list' : [{
+        'id'         : posting.id,
+        'title'      : posting.title,
+        'content'    : posting.content,
+        'views'      : posting.views,
+        'created_at' : posting.created_at.strftime("%Y/%m/%d"),
+        'author_id'  : posting.user.id,
+        'author'     : posting.user.name,
+    } for posting in Posting.objects.select_related('user')]})
+
+def projected_posting_list():
+    return render_json({'posting_list' : list(format_dates(project(Posting.objects.all(), POSTING_FIELDS), 'created_at'))})
+
+def legacy_comment_list(posting_id):
+    return json.dumps({'comment_list' : [{
+        'comment_id'          : comment.id,
+        'comment_author'      : comment.user.name,
+        'comment_content'     : comment.content,
+        'comment_created_at'  : comment.created_at.strftime("%Y/%m/%d"),
+        'child_comment_count' : comment.child_comments.count(),
+    } for comment in Comment.objects.select_related('user').filter(posting_id = posting_id, parent_comment_id = None).prefetch_related('child_comments')]})
+
+def projected_comment_list(posting_id):
+    comments = project(Comment.objects.filter(posting_id = posting_id, parent_comment_id = None), COMMENT_FIELDS)
+
+    return render_json({'comment_list' : list(format_dates(comments, 'comment_created_at'))})
+
+def legacy_child_comment_list(comment_id):
+    comment = Comment.objects.prefetch_related('child_comments__user').get(id = comment_id)
+
+    return json.dumps({'child_comment_list' : [{
+        'child_comment_id'         : child_comment.id,
+        'child_comment_author'     : child_comment.user.name,
+        'child_comment_content'    : child_comment.content,
+        'child_comment_created_at' : child_comment.created_at.strftime("%Y/%m/%d"),
+    } for child_comment in comment.child_comments.all()]})
+
+def projected_child_comment_list(comment_id):
+    child_comments = project(Comment.objects.filter(parent_comment_id = comment_id), CHILD_COMMENT_FIELDS)
+
+    return render_json({'child_comment_list' : list(format_dates(child_comments, 'child_comment_created_at'))})
+
+class Command(BaseCommand):
+    help = 'Measures rows/second of the legacy model-instance serializers against the projection serializers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type = int, default = 2000)
+        parser.add_argument('--repeat', type = int, default = 5)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+
+        try:
+            with transaction.atomic():
+                posting_id, comment_id = self.seed(rows)
+
+                for endpoint, legacy, projected in [
+                    ('PostingView.get', legacy_posting_list, projected_posting_list),
+                    ('CommentView.get', lambda: legacy_comment_list(posting_id), lambda: projected_comment_list(posting_id)),
+                    ('CommentDetailView.get', lambda: legacy_child_comment_list(comment_id), lambda: projected_child_comment_list(comment_id)),
+                ]:
+                    before = self.measure(legacy, rows, options['repeat'])
+                    after  = self.measure(projected, rows, options['repeat'])
+
+                    self.stdout.write(f'{endpoint:<24} before {before:>12,.0f} rows/s  after {after:>12,.0f} rows/s  x{after / before:.2f}')
+
+                raise Rollback()
+
+        except Rollback:
+            pass
+
+    def seed(self, rows):
+        user     = User.objects.create(name = '벤치마크', email = 'bench@bench.bench', password = 'bench')
+        category = Category.objects.create(name = '벤치마크')
+        Posting.objects.bulk_create([
+            Posting(category = category, user = user, title = f'제목 {index}', content = '게시글 내용 ' * 50)
+            for index in range(rows)
+        ])
+
+        posting = Posting.objects.filter(category = category).first()
+        Comment.objects.bulk_create([
+            Comment(posting = posting, user = user, content = f'댓글 {index}') for index in range(rows)
+        ])
+
+        parent = Comment.objects.filter(posting = posting).first()
+        Comment.objects.bulk_create([
+            Comment(posting = posting, user = user, content = f'대댓글 {index}', parent_comment = parent) for index in range(rows)
+        ])
+
+        return posting.id, parent.id
+
+    def measure(self, func, rows, repeat):
+        best = None
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best    = elapsed if best is None else min(best, elapsed)
+
+        return rows / best
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db                   import transaction
+
+from postings.models             import Posting, PostingToken
+from postings.search             import tokenize
+
+class Command(BaseCommand):
+    help = 'Rebuilds the posting keyword search index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type = int, default = 1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        indexed    = 0
+        tokens     = []
+
+        with transaction.atomic():
+            PostingToken.objects.all().delete()
+
+            for posting in Posting.objects.only('id', 'title', 'content').iterator(chunk_size = batch_size):
+                tokens.extend(
+                    PostingToken(posting_id = posting.id, token = token)
+                    for token in tokenize(f'{posting.title} {posting.content}')
+                )
+                indexed += 1
+
+                if len(tokens) >= batch_size:
+                    PostingToken.objects.bulk_create(tokens, batch_size = batch_size)
+                    tokens = []
+
+            PostingToken.objects.bulk_create(tokens, batch_size = batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} postings'))
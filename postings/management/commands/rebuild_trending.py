@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.jobs                   import run_pending_jobs
+from postings.counters           import view_counter
+from postings.trending           import rebuild_trending, trending_counter
+
+class Command(BaseCommand):
+    help = 'Recomputes the trending rankings of every category from stored views and comments'
+
+    def handle(self, *args, **options):
+        # buffered views are counted once they are stored, so pending ranking events would count twice
+        view_counter.flush()
+        run_pending_jobs(kinds = ['flush_views'])
+        trending_counter.reset()
+
+        ranked = rebuild_trending()
+
+        self.stdout.write(self.style.SUCCESS(f'Ranked {ranked} postings'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db                   import transaction
+from django.db.models            import Count
+
+from postings.conditional        import touch_posting
+from postings.models             import Comment, Posting
+
+class Command(BaseCommand):
+    help = 'Repairs drift in Posting.comment_count and Comment.child_comment_count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action = 'store_true')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            posting_ids = self.reconcile(
+                Posting.objects.annotate(actual = Count('comment')), 'comment_count', options['dry_run']
+            )
+            comment_ids = self.reconcile(
+                Comment.objects.annotate(actual = Count('child_comments')), 'child_comment_count', options['dry_run']
+            )
+            changed_posting_ids = set(posting_ids) | set(Comment.objects.filter(id__in = comment_ids).values_list('posting_id', flat = True))
+
+            if not options['dry_run']:
+                touch_posting(changed_posting_ids)
+
+        self.stdout.write(self.style.SUCCESS(f'Repaired {len(posting_ids)} postings and {len(comment_ids)} comments'))
+
+    def reconcile(self, queryset, field_name, dry_run):
+        ids_by_count = {}
+
+        for object_id, stored, actual in queryset.values_list('id', field_name, 'actual').iterator():
+            if stored != actual:
+                ids_by_count.setdefault(actual, []).append(object_id)
+
+        if not dry_run:
+            for actual, object_ids in ids_by_count.items():
+                queryset.model.objects.filter(id__in = object_ids).update(**{field_name : actual})
+
+        return [object_id for object_ids in ids_by_count.values() for object_id in object_ids]
@@ -0,0 +1,21 @@
+from datetime                    import date
+
+from django.core.management.base import BaseCommand
+
+from core.jobs                   import run_pending_jobs
+from postings.unique_views       import rollup_sketches, unique_view_counter
+
+class Command(BaseCommand):
+    help = 'Merges old daily unique-viewer sketches into weekly ones and drops expired weeks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type = int, default = 7)
+        parser.add_argument('--keep-weeks', type = int, default = 12)
+
+    def handle(self, *args, **options):
+        unique_view_counter.flush()
+        run_pending_jobs(kinds = ['flush_unique_views'])
+
+        weeks, expired = rollup_sketches(date.today(), options['keep_days'], options['keep_weeks'])
+
+        self.stdout.write(self.style.SUCCESS(f'Merged into {weeks} weekly sketches and removed {expired} sketches'))
@@ -0,0 +1,123 @@
+import random, bcrypt
+
+from django.conf                 import settings
+from django.core.management      import call_command
+from django.core.management.base import BaseCommand
+from django.db                   import transaction
+from django.db.models            import Max
+
+from postings.categories         import category_registry
+from postings.models             import Category, Comment, Posting
+from users.models                import User
+
+SEED_PASSWORD = 'seedpassword1!'
+
+KOREAN_WORDS = [
+    '게시글', '댓글', '오늘', '내일', '개발', '파이썬', '장고', '서버', '데이터', '검색', '성능', '최적화',
+    '질문', '답변', '공유', '후기', '추천', '여행', '맛집', '카페', '영화', '음악', '운동', '공부',
+    '회사', '프로젝트', '코드', '리뷰', '배포', '테스트', '인덱스', '쿼리', '캐시', '사용자', '로그인', '정말',
+    '너무', '좋아요', '감사합니다', '그리고', '하지만', '그래서', '이번', '다음', '처음', '마지막', '같이', '함께',
+]
+ENGLISH_WORDS = ['django', 'mongo', 'api', 'json', 'cache', 'query', 'index', 'python', 'aws', 'jwt']
+
+def words(rng, count):
+    return ' '.join(
+        rng.choice(ENGLISH_WORDS) if rng.random() < 0.1 else rng.choice(KOREAN_WORDS) for _ in range(count)
+    )
+
+def bounded(value, lowest, highest):
+    return max(lowest, min(highest, int(value)))
+
+class Command(BaseCommand):
+    help = 'Bulk-generates users, categories, postings and nested comments for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type = int, default = 100)
+        parser.add_argument('--categories', type = int, default = 10)
+        parser.add_argument('--postings', type = int, default = 1000)
+        parser.add_argument('--comments', type = int, default = 5000)
+        parser.add_argument('--reply-ratio', type = float, default = 0.4)
+        parser.add_argument('--batch-size', type = int, default = 1000)
+        parser.add_argument('--seed', type = int, default = 0)
+        parser.add_argument('--skip-search-index', action = 'store_true')
+
+    def handle(self, *args, **options):
+        rng        = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        password   = bcrypt.hashpw(SEED_PASSWORD.encode('utf-8'), bcrypt.gensalt(settings.BCRYPT_ROUNDS)).decode('utf-8')
+
+        with transaction.atomic():
+            offset   = (User.objects.aggregate(last = Max('id'))['last'] or 0) + 1
+            user_ids = self.create(User, [
+                User(name = f'시드유저{offset + index}', email = f'seed{offset + index}@example.com', password = password)
+                for index in range(options['users'])
+            ], batch_size)
+
+            category_ids = self.create(Category, [
+                Category(name = f'카테고리 {words(rng, 1)} {index}') for index in range(options['categories'])
+            ], batch_size)
+            # bulk_create sends no post_save signals
+            category_registry.invalidate()
+
+            postings = [
+                Posting(
+                    category_id = rng.choice(category_ids),
+                    user_id     = rng.choice(user_ids),
+                    title       = words(rng, bounded(rng.gauss(5, 2), 1, 12))[:100],
+                    content     = words(rng, bounded(rng.lognormvariate(4, 1), 3, 3000)),
+                    views       = int(rng.paretovariate(1.2)) - 1,
+                )
+                for _ in range(options['postings'])
+            ]
+
+            # comment activity is skewed towards a few popular postings and top-level comments
+            comments        = options['comments'] if postings else 0
+            replies         = int(comments * options['reply_ratio'])
+            top_level_count = comments - replies
+            posting_indexes = rng.choices(range(len(postings)), [rng.paretovariate(1.5) for _ in postings], k = top_level_count)
+            parent_indexes  = rng.choices(range(top_level_count), [rng.paretovariate(1.5) for _ in range(top_level_count)], k = replies) if top_level_count else []
+            top_levels      = [
+                Comment(user_id = rng.choice(user_ids), content = words(rng, bounded(rng.lognormvariate(2, 0.8), 1, 80))[:500])
+                for _ in range(top_level_count)
+            ]
+
+            for posting_index in posting_indexes:
+                postings[posting_index].comment_count += 1
+
+            for parent_index in parent_indexes:
+                top_levels[parent_index].child_comment_count          += 1
+                postings[posting_indexes[parent_index]].comment_count += 1
+
+            posting_ids = self.create(Posting, postings, batch_size)
+
+            for comment, posting_index in zip(top_levels, posting_indexes):
+                comment.posting_id = posting_ids[posting_index]
+
+            comment_ids = self.create(Comment, top_levels, batch_size)
+
+            self.create(Comment, [
+                Comment(
+                    posting_id        = top_levels[parent_index].posting_id,
+                    parent_comment_id = comment_ids[parent_index],
+                    user_id           = rng.choice(user_ids),
+                    content           = words(rng, bounded(rng.lognormvariate(1.5, 0.8), 1, 60))[:500],
+                )
+                for parent_index in parent_indexes
+            ], batch_size)
+
+        if not options['skip_search_index']:
+            call_command('rebuild_search_index', stdout = self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(user_ids)} users, {len(category_ids)} categories, {len(postings)} postings '
+            f'and {top_level_count + replies} comments (password: {SEED_PASSWORD})'
+        ))
+
+    def create(self, model, objects, batch_size):
+        """
+        bulk_create does not set primary keys on every backend, so the new ids are read back in insertion order.
+        """
+        last = model.objects.aggregate(last = Max('id'))['last'] or 0
+        model.objects.bulk_create(objects, batch_size = batch_size)
+
+        return list(model.objects.filter(id__gt = last).order_by('id').values_list('id', flat = True))
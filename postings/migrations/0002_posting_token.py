@@ -0,0 +1,26 @@
+# Generated by Django 3.2.9 on 2026-10-19 00:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostingToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=2)),
+                ('posting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='postings.posting')),
+            ],
+            options={
+                'db_table': 'posting_tokens',
+                'unique_together': {('token', 'posting')},
+            },
+        ),
+    ]
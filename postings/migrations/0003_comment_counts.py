@@ -0,0 +1,35 @@
+# Generated by Django 3.2.9 on 2026-10-19 00:29
+
+from django.db import migrations, models
+
+
+def backfill_counts(apps, schema_editor):
+    Posting = apps.get_model('postings', 'Posting')
+    Comment = apps.get_model('postings', 'Comment')
+
+    for posting in Posting.objects.annotate(actual=models.Count('comment')).iterator():
+        Posting.objects.filter(id=posting.id).update(comment_count=posting.actual)
+
+    for comment in Comment.objects.annotate(actual=models.Count('child_comments')).iterator():
+        Comment.objects.filter(id=comment.id).update(child_comment_count=comment.actual)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0002_posting_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='child_comment_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='posting',
+            name='comment_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.9 on 2026-10-19 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0003_comment_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['parent_comment', 'created_at', 'id'], name='comments_parent_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['posting', 'parent_comment', 'created_at', 'id'], name='comments_posting_created_idx'),
+        ),
+    ]
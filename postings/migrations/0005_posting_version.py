@@ -0,0 +1,36 @@
+# Generated by Django 3.2.9 on 2026-10-19 00:45
+
+from django.db import migrations, models
+
+from core.migrations_utils import convert_dates_to_datetimes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0004_comment_thread_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posting',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='posting',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(convert_dates_to_datetimes('postings', ('category', 'comment', 'posting')), migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.9 on 2026-10-19 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0005_posting_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='posting',
+            index=models.Index(fields=['category', 'created_at', 'id'], name='postings_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='posting',
+            index=models.Index(fields=['created_at', 'id'], name='postings_created_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.9 on 2026-10-19 00:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0006_posting_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posting',
+            name='unique_views',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='PostingViewSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=16)),
+                ('registers', models.BinaryField()),
+                ('posting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='postings.posting')),
+            ],
+            options={
+                'db_table': 'posting_view_sketches',
+                'unique_together': {('posting', 'window')},
+            },
+        ),
+    ]
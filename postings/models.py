@@ -13,23 +13,52 @@ class Category(TimeStampModel):
         return self.name
 
 class Posting(TimeStampModel):
-    category = models.ForeignKey(Category, on_delete=models.CASCADE)
-    user     = models.ForeignKey(User, on_delete=models.CASCADE)
-    title    = models.CharField(max_length=100)
-    views    = models.IntegerField(default=0)
-    content  = models.TextField()
+    category      = models.ForeignKey(Category, on_delete=models.CASCADE)
+    user          = models.ForeignKey(User, on_delete=models.CASCADE)
+    title         = models.CharField(max_length=100)
+    views         = models.IntegerField(default=0)
+    content       = models.TextField()
+    comment_count = models.IntegerField(default=0)
+    version       = models.PositiveIntegerField(default=0)
+    unique_views  = models.IntegerField(default=0)
 
     class Meta:
         db_table = 'postings'
+        indexes  = [
+            models.Index(fields=['category', 'created_at', 'id'], name='postings_category_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='postings_created_idx'),
+        ]
     
     def __str__(self):
         return self.title
 
 class Comment(TimeStampModel):
-    posting        = models.ForeignKey(Posting, on_delete=models.CASCADE)
-    user           = models.ForeignKey(User, on_delete=models.CASCADE)
-    parent_comment = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, related_name='child_comments')
-    content        = models.CharField(max_length=500)
+    posting             = models.ForeignKey(Posting, on_delete=models.CASCADE)
+    user                = models.ForeignKey(User, on_delete=models.CASCADE)
+    parent_comment      = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, related_name='child_comments')
+    content             = models.CharField(max_length=500)
+    child_comment_count = models.IntegerField(default=0)
     
     class Meta:
-        db_table = 'comments'
\ No newline at end of file
+        db_table = 'comments'
+        indexes  = [
+            models.Index(fields=['parent_comment', 'created_at', 'id'], name='comments_parent_created_idx'),
+            models.Index(fields=['posting', 'parent_comment', 'created_at', 'id'], name='comments_posting_created_idx'),
+        ]
+
+class PostingToken(models.Model):
+    posting = models.ForeignKey(Posting, on_delete=models.CASCADE)
+    token   = models.CharField(max_length=2)
+
+    class Meta:
+        db_table        = 'posting_tokens'
+        unique_together = ('token', 'posting')
+
+class PostingViewSketch(models.Model):
+    posting   = models.ForeignKey(Posting, on_delete=models.CASCADE)
+    window    = models.CharField(max_length=16)
+    registers = models.BinaryField()
+
+    class Meta:
+        db_table        = 'posting_view_sketches'
+        unique_together = ('posting', 'window')
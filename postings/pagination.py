@@ -0,0 +1,72 @@
+import base64, json, binascii
+
+from django.conf            import settings
+from django.core.exceptions import ValidationError
+from django.db.models       import Q
+
+class InvalidCursor(Exception):
+    pass
+
+def encode_cursor(created_at, object_id):
+    raw = json.dumps([created_at.isoformat(), object_id])
+
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('utf-8')
+
+def decode_cursor(cursor, model):
+    try:
+        created_at, object_id = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+        created_at            = model._meta.get_field('created_at').to_python(created_at)
+
+        return created_at, int(object_id)
+
+    except (binascii.Error, UnicodeError, ValueError, TypeError, ValidationError):
+        raise InvalidCursor(cursor)
+
+def get_page_size(value):
+    page_size = int(value) if value else settings.POSTING_PAGE_SIZE
+
+    if page_size < 1:
+        raise ValueError(value)
+
+    return min(page_size, settings.POSTING_MAX_PAGE_SIZE)
+
+def get_page(value):
+    """
+    Parses the ``page`` query parameter, raising ValueError unless it is a positive integer.
+    """
+    page = int(value) if value else 1
+
+    if page < 1:
+        raise ValueError(value)
+
+    return page
+
+def seek(queryset, cursor):
+    """
+    Orders ``queryset`` by ``(created_at, id)`` and skips everything up to ``cursor``.
+    """
+    if cursor:
+        created_at, object_id = decode_cursor(cursor, queryset.model)
+        queryset              = queryset.filter(
+            Q(created_at__gt = created_at) | Q(created_at = created_at, id__gt = object_id)
+        )
+
+    return queryset.order_by('created_at', 'id')
+
+def keyset_paginate(queryset, cursor, page_size):
+    """
+    Returns the page following ``cursor`` as a list and the cursor of the next page,
+    or None on the last page.
+    """
+    page = list(seek(queryset, cursor)[:page_size + 1])
+
+    if len(page) <= page_size:
+        return page, None
+
+    page = page[:page_size]
+    last = page[-1]
+
+    if isinstance(last, dict):
+        return page, encode_cursor(last['created_at'], last['id'])
+
+    return page, encode_cursor(last.created_at, last.id)
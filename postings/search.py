@@ -0,0 +1,65 @@
+import re
+
+from django.db.models import Count, Q
+
+from postings.models  import PostingToken
+
+WORD_REGEX = re.compile(r'\w+')
+NGRAM_SIZE = 2
+
+def tokenize(text):
+    tokens = set()
+
+    for word in WORD_REGEX.findall(text.lower()):
+        for size in range(1, NGRAM_SIZE + 1):
+            tokens.update(word[i : i + size] for i in range(len(word) - size + 1))
+
+    return tokens
+
+def query_tokens(keyword):
+    tokens = set()
+
+    for word in WORD_REGEX.findall(keyword.lower()):
+        if len(word) < NGRAM_SIZE:
+            tokens.add(word)
+        else:
+            tokens.update(word[i : i + NGRAM_SIZE] for i in range(len(word) - NGRAM_SIZE + 1))
+
+    return tokens
+
+def index_posting(posting):
+    tokens   = tokenize(f'{posting.title} {posting.content}')
+    existing = set(PostingToken.objects.filter(posting_id = posting.id).values_list('token', flat = True))
+
+    if existing - tokens:
+        PostingToken.objects.filter(posting_id = posting.id, token__in = existing - tokens).delete()
+
+    PostingToken.objects.bulk_create([
+        PostingToken(posting_id = posting.id, token = token) for token in tokens - existing
+    ])
+
+def search_postings(keyword):
+    """
+    Returns a Q object matching postings whose title or content contains ``keyword``.
+
+    Candidates come from the token index, so only postings sharing every n-gram of the
+    keyword are rechecked with ``icontains``; the table itself is never scanned. The
+    candidates are a subquery, so the whole search runs as a single query.
+    """
+    keyword_filter = Q(title__icontains = keyword) | Q(content__icontains = keyword)
+    tokens         = query_tokens(keyword)
+
+    if not tokens:
+        return keyword_filter
+
+    # postings holding every token, intersected by the database instead of in Python
+    candidate_ids = (
+        PostingToken.objects
+        .filter(token__in = tokens)
+        .values('posting_id')
+        .annotate(matched = Count('token'))
+        .filter(matched = len(tokens))
+        .values('posting_id')
+    )
+
+    return Q(id__in = candidate_ids) & keyword_filter
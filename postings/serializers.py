@@ -0,0 +1,62 @@
+from django.db.models import F
+
+DATE_FORMAT = '%Y/%m/%d'
+
+POSTING_FIELDS = {
+    'id'         : 'id',
+    'title'      : 'title',
+    'content'    : 'content',
+    'views'      : 'views',
+    'created_at' : 'created_at',
+    'author_id'  : 'user_id',
+    'author'     : 'user__name',
+}
+
+COMMENT_FIELDS = {
+    'comment_id'          : 'id',
+    'comment_author'      : 'user__name',
+    'comment_content'     : 'content',
+    'comment_created_at'  : 'created_at',
+    'child_comment_count' : 'child_comment_count',
+}
+
+CHILD_COMMENT_FIELDS = {
+    'child_comment_id'         : 'id',
+    'child_comment_author'     : 'user__name',
+    'child_comment_content'    : 'content',
+    'child_comment_created_at' : 'created_at',
+}
+
+def project(queryset, fields):
+    """
+    Selects only the columns named in ``fields`` (output name -> lookup) as plain dicts.
+    """
+    names   = [name for name, lookup in fields.items() if name == lookup]
+    renamed = {name : F(lookup) for name, lookup in fields.items() if name != lookup}
+
+    return queryset.values(*names, **renamed)
+
+class DateFormatter:
+    def __init__(self, date_format = DATE_FORMAT):
+        self.date_format = date_format
+        self.formatted   = {}
+
+    def __call__(self, value):
+        day = value.toordinal()
+
+        if day not in self.formatted:
+            self.formatted[day] = value.strftime(self.date_format)
+
+        return self.formatted[day]
+
+def format_dates(rows, *fields):
+    """
+    Formats the date ``fields`` of every row in place, calling strftime once per distinct day.
+    """
+    formatter = DateFormatter()
+
+    for row in rows:
+        for field in fields:
+            row[field] = formatter(row[field])
+
+        yield row
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch          import receiver
+
+from postings.categories      import category_registry
+from postings.models          import Category
+
+@receiver(post_save, sender = Category)
+@receiver(post_delete, sender = Category)
+def invalidate_categories(sender, instance, **kwargs):
+    category_registry.invalidate()
@@ -0,0 +1,23 @@
+import json
+
+from core.renderers import render_json
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+def wants_ndjson(request):
+    return NDJSON_CONTENT_TYPE in request.headers.get('Accept', '')
+
+def stream_json_list(key, rows):
+    """
+    Yields ``{"<key>": [...], "next": null}`` one row at a time, so the whole list is never held in memory.
+    """
+    yield b'{%s:[' % json.dumps(key).encode('utf-8')
+
+    for index, row in enumerate(rows):
+        yield (b',' if index else b'') + render_json(row)
+
+    yield b'],"next":null}'
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield render_json(row) + b'\n'
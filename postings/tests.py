@@ -1,10 +1,25 @@
-import json, jwt
-
-from django.test     import TestCase, Client
-
-from postings.models import Category, Posting, Comment
-from users.models    import User
-from django.conf     import settings
+import json, jwt, threading
+
+from datetime               import date, datetime, timezone as dt_timezone
+from io                     import StringIO
+from django.core.cache      import caches
+from django.core.management import call_command
+from django.db              import connection
+from django.db.models       import F
+from django.test            import TestCase, TransactionTestCase, Client
+from unittest.mock          import patch
+
+from core.jobs              import enqueue, run_pending_jobs
+from core.testing           import QueryBudgetTestMixin
+from postings.categories    import category_registry
+from postings.counters      import BufferedCounter, view_counter
+from postings.dedup         import ViewedFilter
+from postings.hyperloglog   import HyperLogLog, hash_value
+from postings.models        import Category, Posting, Comment, PostingViewSketch
+from postings.trending      import TrendingRanking, day_timestamp, rebuild_trending, trending_counter
+from postings.unique_views  import ALL_TIME_WINDOW, day_window, flush_unique_views, rollup_sketches, unique_view_counter, week_window
+from users.models           import User
+from django.conf            import settings
 
 class PostingViewTest(TestCase) :
     def setUp(self):
@@ -95,9 +110,102 @@ class PostingViewTest(TestCase) :
         
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {
-            'posting_list' : posting_list
+            'posting_list' : posting_list,
+            'next'         : None
         })
 
+    def test_success_get_posting_list_with_cursor(self) :
+        client = Client()
+
+        Posting.objects.bulk_create([
+            Posting(id = posting_id, title = f'타이틀{posting_id}', content = '내용', category_id = 1, user_id = 1)
+            for posting_id in range(2, 6)
+        ])
+
+        response = client.get('/postings?limit=2')
+        page     = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([posting['id'] for posting in page['posting_list']], [1, 2])
+
+        response = client.get(f'/postings?limit=2&cursor={page["next"]}')
+        page     = response.json()
+
+        self.assertEqual([posting['id'] for posting in page['posting_list']], [3, 4])
+
+        response = client.get(f'/postings?limit=2&cursor={page["next"]}')
+        page     = response.json()
+
+        self.assertEqual([posting['id'] for posting in page['posting_list']], [5])
+        self.assertIsNone(page['next'])
+
+    def test_success_stream_posting_list(self) :
+        client = Client()
+
+        Posting.objects.create(id = 2, title = '타이틀2', content = '내용', category_id = 1, user_id = 1)
+
+        response = client.get('/postings?stream=true')
+        body     = json.loads(b''.join(response.streaming_content))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([posting['id'] for posting in body['posting_list']], [1, 2])
+        self.assertIsNone(body['next'])
+
+    def test_success_stream_posting_list_ndjson(self) :
+        client = Client()
+
+        Posting.objects.create(id = 2, title = '타이틀2', content = '내용', category_id = 1, user_id = 1)
+
+        response = client.get('/postings', HTTP_ACCEPT = 'application/x-ndjson')
+        lines    = b''.join(response.streaming_content).decode('utf-8').splitlines()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line)['id'] for line in lines], [1, 2])
+
+    def test_failure_caused_invalid_cursor_posting_list(self) :
+        client = Client()
+
+        response = client.get('/postings?cursor=invalid')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            'message' : 'INVALID_CURSOR'
+        })
+
+    def test_success_get_posting_list_by_keyword(self) :
+        client = Client()
+
+        posting_info = {
+            'title'       : '검색 타이틀',
+            'content'     : '인덱스로 찾는 게시글',
+            'category_id' : 1
+        }
+
+        client.post('/postings', json.dumps(posting_info), content_type='application/json', **headers)
+        run_pending_jobs()
+
+        with self.assertNumQueries(1):
+            response = client.get('/postings?keyword=찾는')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([posting['title'] for posting in response.json()['posting_list']], ['검색 타이틀'])
+
+        response = client.get('/postings?keyword=없는단어')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['posting_list'], [])
+
+    def test_success_rebuild_search_index(self) :
+        client = Client()
+
+        call_command('rebuild_search_index', stdout = StringIO())
+
+        response = client.get('/postings?keyword=타이')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([posting['id'] for posting in response.json()['posting_list']], [1])
+
     def test_failure_caused_invalid_category_id_posting_list(self) :
         client = Client()
 
@@ -108,6 +216,183 @@ class PostingViewTest(TestCase) :
             'message' : 'CATEGORY_DOES_NOT_EXIST'
         })
 
+class CategoryViewTest(TestCase) :
+    def setUp(self) :
+        category_registry.clear()
+        Category.objects.create(id=1, name='테스트 카테고리1')
+
+    def tearDown(self) :
+        caches['postings'].clear()
+        category_registry.clear()
+        Category.objects.all().delete()
+
+    def test_success_category_list_from_registry(self) :
+        client = Client()
+
+        response = client.get('/postings/categories')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'category_list' : [{'id' : 1, 'name' : '테스트 카테고리1'}]
+        })
+
+        with self.assertNumQueries(0):
+            self.assertTrue(category_registry.exists(1))
+            self.assertFalse(category_registry.exists('abc'))
+            self.assertEqual(client.get('/postings/categories', HTTP_IF_NONE_MATCH = response['ETag']).status_code, 304)
+
+    def test_success_category_changed_by_another_process(self) :
+        client = Client()
+
+        etag = client.get('/postings/categories')['ETag']
+        Category.objects.bulk_create([Category(id=2, name='테스트 카테고리2')])
+
+        with self.assertNumQueries(0):
+            self.assertFalse(category_registry.exists(2))
+            self.assertFalse(category_registry.exists(3))
+
+        category_registry.loaded_at -= settings.CATEGORY_REGISTRY_CHECK_INTERVAL
+
+        self.assertTrue(category_registry.exists(2))
+
+        response = client.get('/postings/categories', HTTP_IF_NONE_MATCH = etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['category_list']), 2)
+
+    def test_success_category_registry_refreshes_on_change(self) :
+        client = Client()
+
+        client.get('/postings/categories')
+        Category.objects.create(id=2, name='테스트 카테고리2')
+
+        self.assertTrue(category_registry.exists(2))
+        self.assertEqual(len(client.get('/postings/categories').json()['category_list']), 2)
+
+        Category.objects.filter(id=2).delete()
+
+        self.assertFalse(category_registry.exists(2))
+
+class CategoryDeletedElsewhereTest(TransactionTestCase) :
+    def setUp(self) :
+        global headers
+        access_token = jwt.encode({'id' : 1}, settings.SECRET_KEY, algorithm = settings.ALGORITHM)
+        headers      = {'HTTP_Authorization': access_token}
+        User.objects.create(id=1, name='kylee', email='kylee@gmail.com', password='kylee11!')
+        Category.objects.create(id=1, name='테스트 카테고리1')
+        category_registry.clear()
+
+    def tearDown(self) :
+        category_registry.clear()
+
+    def test_failure_posting_in_category_deleted_by_another_process(self) :
+        client = Client()
+
+        self.assertTrue(category_registry.exists(1))
+
+        # the signal only reaches the registry of the deleting process
+        with patch.object(category_registry, 'invalidate'):
+            Category.objects.filter(id=1).delete()
+
+        response = client.post('/postings', json.dumps({'title' : '제목', 'content' : '내용', 'category_id' : 1}), content_type='application/json', **headers)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'message' : 'CATEGORY_DOES_NOT_EXIST'})
+        self.assertFalse(Posting.objects.exists())
+        self.assertFalse(category_registry.exists(1))
+
+class TrendingViewTest(TestCase) :
+    def setUp(self) :
+        global headers
+        access_token = jwt.encode({'id' : 1}, settings.SECRET_KEY, algorithm = settings.ALGORITHM)
+        headers      = {'HTTP_Authorization': access_token}
+        User.objects.create(id=1, name='kylee', email='kylee@gmail.com', password='kylee11!')
+        Category.objects.create(id=1, name='테스트 카테고리1')
+        Category.objects.create(id=2, name='테스트 카테고리2')
+        Posting.objects.create(id=1, title='조회만 된 글', content='테스트 내용', category_id=1, user_id=1)
+        Posting.objects.create(id=2, title='댓글이 달린 글', content='테스트 내용', category_id=1, user_id=1)
+        Posting.objects.create(id=3, title='다른 카테고리 글', content='테스트 내용', category_id=2, user_id=1)
+
+    def tearDown(self) :
+        view_counter.reset()
+        unique_view_counter.reset()
+        trending_counter.reset()
+        caches['postings'].clear()
+        caches[settings.TRENDING_CACHE].clear()
+        category_registry.clear()
+        User.objects.all().delete()
+        Category.objects.all().delete()
+        Posting.objects.all().delete()
+
+    def test_success_trending_view(self) :
+        client = Client()
+
+        for _ in range(3):
+            client.get('/postings/1')
+
+        client.get('/postings/3')
+        client.post('/postings/comments/2', json.dumps({'content' : '댓글'}), content_type='application/json', **headers)
+        run_pending_jobs()
+        trending_counter.flush()
+        category_registry.refresh()
+
+        with self.assertNumQueries(2):
+            response = client.get('/postings/trending?category_id=1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([posting['id'] for posting in response.json()['posting_list']], [2, 1])
+        self.assertEqual(response.json()['posting_list'][0]['comment_count'], 1)
+        self.assertEqual([posting['id'] for posting in client.get('/postings/trending?limit=2').json()['posting_list']], [2, 1])
+        self.assertEqual([posting['id'] for posting in client.get('/postings/trending?category_id=2').json()['posting_list']], [3])
+
+    def test_failure_trending_view(self) :
+        client = Client()
+
+        self.assertEqual(client.get('/postings/trending?category_id=9').json(), {'message' : 'CATEGORY_DOES_NOT_EXIST'})
+        self.assertEqual(client.get('/postings/trending?limit=0').json(), {'message' : 'INVALID_LIMIT'})
+
+    def test_success_trending_ranking_decays_and_stays_bounded(self) :
+        ranking = TrendingRanking('postings', size = 2, half_life = 60)
+
+        ranking.record({1 : (1, 4)}, timestamp = 0)
+        ranking.record({2 : (1, 1)}, timestamp = 180)
+
+        self.assertEqual(ranking.top(1, 10, timestamp = 180), [(2, 1.0), (1, 0.5)])
+
+        ranking.record({3 : (1, 1), 2 : (1, 1)}, timestamp = 240)
+
+        self.assertEqual([posting_id for posting_id, _ in ranking.top(1, 10, timestamp = 240)], [2, 3])
+        self.assertEqual([posting_id for posting_id, _ in ranking.top('all', 1, timestamp = 240)], [2])
+
+    def test_success_rebuild_trending(self) :
+        Posting.objects.filter(id = 1).update(views = 3)
+        Comment.objects.create(user_id = 1, posting_id = 2, content = '댓글')
+        Comment.objects.create(user_id = 1, posting_id = 3, content = '댓글')
+
+        output = StringIO()
+        call_command('rebuild_trending', stdout = output)
+
+        self.assertIn('Ranked 3 postings', output.getvalue())
+        self.assertEqual([posting['id'] for posting in Client().get('/postings/trending').json()['posting_list']], [2, 3, 1])
+
+    def test_success_rebuild_drops_hits_buffered_before_it(self) :
+        Posting.objects.filter(id = 1).update(views = 3)
+
+        # buffered in another process before the rebuild started
+        trending_counter.add(3, 50)
+        rebuild_trending()
+        trending_counter.flush()
+
+        self.assertEqual([posting['id'] for posting in Client().get('/postings/trending').json()['posting_list']], [1])
+
+        trending_counter.add(3, 50)
+        trending_counter.flush()
+
+        self.assertEqual([posting['id'] for posting in Client().get('/postings/trending').json()['posting_list']], [3, 1])
+
+    def test_success_day_timestamp_uses_time_zone(self) :
+        self.assertEqual(day_timestamp(date(2021, 11, 3)), datetime(2021, 11, 2, 15, tzinfo = dt_timezone.utc).timestamp())
+
 class PostingParamViewTest(TestCase) :
     def setUp(self) :
         global headers, posting
@@ -125,6 +410,11 @@ class PostingParamViewTest(TestCase) :
         posting = Posting.objects.create(id = 1, title='테스트 타이틀', content='테스트 내용', category_id= 1, user_id= 1)
         
     def tearDown(self) :
+        view_counter.reset()
+        unique_view_counter.reset()
+        trending_counter.reset()
+        caches['postings'].clear()
+        caches[settings.VIEW_DEDUP_CACHE].clear()
         User.objects.all().delete()
         Category.objects.all().delete()
         Posting.objects.all().delete()
@@ -143,6 +433,20 @@ class PostingParamViewTest(TestCase) :
             'message' : 'SUCCESS'
         })
 
+    def test_success_modify_posting_keeps_concurrent_counts(self) :
+        client = Client()
+        stale  = Posting.objects.get(id = 1)
+
+        Posting.objects.filter(id = 1).update(views = F('views') + 5)
+
+        with patch.object(Posting.objects, 'get', return_value = stale):
+            client.post('/postings/1', json.dumps({'title' : 'update title'}), content_type='application/json', **headers)
+
+        posting = Posting.objects.get(id = 1)
+
+        self.assertEqual(posting.title, 'update title')
+        self.assertEqual(posting.views, 5)
+
     def test_failure_caused_posting_does_not_exist_modify_posting(self) :
         client = Client()
 
@@ -184,6 +488,7 @@ class PostingParamViewTest(TestCase) :
             'id'            : 1,
             'title'         : posting.title,
             'views'         : posting.views,
+            'unique_views'  : 0,
             'content'       : posting.content,
             'author_id'     : posting.user.id,
             'author'        : posting.user.name,
@@ -197,6 +502,217 @@ class PostingParamViewTest(TestCase) :
             'posting_info' : posting_info
         })      
 
+    def test_success_buffered_views_posting_param_view(self) :
+        client = Client()
+
+        client.get('/postings/1')
+        response = client.get('/postings/1')
+
+        self.assertEqual(response.json()['posting_info']['views'], 1)
+        self.assertEqual(Posting.objects.get(id = 1).views, 0)
+
+        view_counter.flush()
+        caches['postings'].clear()
+
+        self.assertEqual(Posting.objects.get(id = 1).views, 0)
+        self.assertEqual(client.get('/postings/1').json()['posting_info']['views'], 2)
+
+        run_pending_jobs()
+
+        self.assertEqual(Posting.objects.get(id = 1).views, 2)
+        self.assertEqual(client.get('/postings/1').json()['posting_info']['views'], 3)
+        self.assertEqual(view_counter.flushed, {})
+
+    def test_success_logged_in_reader_counted_once_posting_param_view(self) :
+        client = Client()
+
+        client.get('/postings/1', **headers)
+        client.get('/postings/1', **headers)
+
+        self.assertEqual(view_counter.get(1), 1)
+
+        client.get('/postings/1')
+
+        self.assertEqual(view_counter.get(1), 2)
+
+    def test_success_unique_views_posting_param_view(self) :
+        client = Client()
+
+        client.get('/postings/1', **headers)
+        client.get('/postings/1', **headers)
+        client.get('/postings/1', REMOTE_ADDR = '10.0.0.1')
+        client.get('/postings/1', REMOTE_ADDR = '10.0.0.2')
+        unique_view_counter.flush()
+
+        self.assertEqual(Posting.objects.get(id = 1).unique_views, 0)
+        self.assertFalse(PostingViewSketch.objects.exists())
+
+        run_pending_jobs()
+
+        self.assertEqual(Posting.objects.get(id = 1).unique_views, 3)
+        self.assertEqual(client.get('/postings/1', REMOTE_ADDR = '10.0.0.1').json()['posting_info']['unique_views'], 3)
+        self.assertEqual(
+            set(PostingViewSketch.objects.values_list('window', flat = True)),
+            {day_window(date.today()), ALL_TIME_WINDOW}
+        )
+
+        client.get('/postings/1', **headers)
+        unique_view_counter.flush()
+        run_pending_jobs()
+
+        self.assertEqual(Posting.objects.get(id = 1).unique_views, 3)
+
+    def test_success_cached_posting_param_view(self) :
+        client = Client()
+
+        client.get('/postings/1')
+        Posting.objects.filter(id = 1).update(title = '캐시되지 않은 타이틀')
+
+        self.assertEqual(client.get('/postings/1').json()['posting_info']['title'], '테스트 타이틀')
+
+        client.post('/postings/1', json.dumps({'title' : '수정된 타이틀'}), content_type='application/json', **headers)
+
+        self.assertEqual(client.get('/postings/1').json()['posting_info']['title'], '수정된 타이틀')
+
+        # a write in another process only changes the stored version
+        Posting.objects.filter(id = 1).update(title = '다른 프로세스의 타이틀', version = F('version') + 1)
+
+        self.assertEqual(client.get('/postings/1').json()['posting_info']['title'], '다른 프로세스의 타이틀')
+
+    def test_success_not_modified_posting_param_view(self) :
+        client = Client()
+
+        response = client.get('/postings/1')
+        etag     = response['ETag']
+
+        self.assertTrue(etag.startswith('W/"1-'))
+
+        with self.assertNumQueries(1):
+            not_modified = client.get('/postings/1', HTTP_IF_NONE_MATCH = etag)
+
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(client.get('/postings/1', HTTP_IF_MODIFIED_SINCE = response['Last-Modified']).status_code, 304)
+
+        client.post('/postings/1', json.dumps({'title' : '수정된 타이틀'}), content_type='application/json', **headers)
+
+        self.assertEqual(client.get('/postings/1', HTTP_IF_NONE_MATCH = etag).status_code, 200)
+
+class ViewedFilterTest(TestCase) :
+    def tearDown(self) :
+        caches[settings.VIEW_DEDUP_CACHE].clear()
+
+    def test_success_viewed_filter_rotates_windows(self) :
+        viewed_filter = ViewedFilter(settings.VIEW_DEDUP_CACHE, bits = 1024, hashes = 3, window = 60)
+
+        self.assertFalse(viewed_filter.seen_or_add(1, 10, now = 600))
+        self.assertTrue(viewed_filter.seen_or_add(1, 10, now = 600))
+        self.assertFalse(viewed_filter.seen_or_add(2, 10, now = 600))
+        self.assertTrue(viewed_filter.seen_or_add(1, 10, now = 660))
+        self.assertFalse(viewed_filter.seen_or_add(1, 10, now = 780))
+
+class BufferedCounterTest(TestCase) :
+    def test_success_quiet_keys_flushed_by_timer(self) :
+        flushed = []
+        done    = threading.Event()
+
+        def flush(pending, since) :
+            flushed.append(pending)
+            done.set()
+
+        counter = BufferedCounter(flush, threshold = 100, interval = 0.05)
+        counter.start_timer()
+        counter.add(1)
+        counter.add(1)
+
+        self.assertTrue(done.wait(timeout = 5))
+        self.assertEqual(flushed, [{1 : 2}])
+        self.assertEqual(counter.get(1), 0)
+
+    def test_success_no_timer_unless_started(self) :
+        counter = BufferedCounter(lambda pending, since : None, threshold = 100, interval = 0.05)
+
+        with patch('postings.counters.threading.Thread') as thread :
+            counter.add(1)
+
+        thread.assert_not_called()
+        self.assertEqual(counter.get(1), 1)
+
+class HyperLogLogTest(TestCase) :
+    def tearDown(self) :
+        Posting.objects.all().delete()
+        User.objects.all().delete()
+        Category.objects.all().delete()
+
+    def test_success_hyperloglog_estimates_and_merges(self) :
+        first, second = HyperLogLog(), HyperLogLog()
+
+        for value in range(10000):
+            first.add(f'user:{value}')
+            second.add(f'user:{value + 5000}')
+
+        self.assertLess(abs(first.count() - 10000), 500)
+        self.assertEqual(len(first.to_bytes()), 4096)
+        self.assertLess(abs(HyperLogLog.from_bytes(first.to_bytes()).merge(second).count() - 15000), 750)
+
+    def test_success_flush_unique_views_updates_postings_at_once(self) :
+        User.objects.create(id = 1, name = 'kylee', email = 'kylee@gmail.com', password = 'kylee11!')
+        Category.objects.create(id = 1, name = '테스트 카테고리1')
+        Posting.objects.bulk_create([
+            Posting(id = posting_id, title = '테스트 타이틀', content = '테스트 내용', category_id = 1, user_id = 1)
+            for posting_id in range(1, 6)
+        ])
+
+        pending = {(posting_id, hash_value(f'user:{viewer}')) : 1 for posting_id in range(1, 6) for viewer in range(posting_id)}
+
+        with self.assertNumQueries(6):
+            flush_unique_views(pending)
+
+        self.assertEqual(dict(Posting.objects.values_list('id', 'unique_views')), {1 : 1, 2 : 2, 3 : 3, 4 : 4, 5 : 5})
+
+    def test_success_flush_unique_views_job_uses_day_seen(self) :
+        User.objects.create(id = 1, name = 'kylee', email = 'kylee@gmail.com', password = 'kylee11!')
+        Category.objects.create(id = 1, name = '테스트 카테고리1')
+        Posting.objects.create(id = 1, title = '테스트 타이틀', content = '테스트 내용', category_id = 1, user_id = 1)
+
+        enqueue('flush_unique_views', day = '2021-11-03', views = [[1, hash_value('user:1')], [1, hash_value('user:2')]])
+        run_pending_jobs()
+
+        self.assertEqual(Posting.objects.get(id = 1).unique_views, 2)
+        self.assertEqual(
+            set(PostingViewSketch.objects.values_list('window', flat = True)),
+            {day_window(date(2021, 11, 3)), ALL_TIME_WINDOW}
+        )
+
+    def test_success_rollup_sketches(self) :
+        User.objects.create(id = 1, name = 'kylee', email = 'kylee@gmail.com', password = 'kylee11!')
+        Category.objects.create(id = 1, name = '테스트 카테고리1')
+        Posting.objects.create(id = 1, title = '테스트 타이틀', content = '테스트 내용', category_id = 1, user_id = 1)
+
+        today  = date(2021, 11, 30)
+        monday = HyperLogLog()
+        friday = HyperLogLog()
+        monday.add('user:1')
+        friday.add('user:2')
+
+        for window, sketch in [
+            (day_window(date(2021, 11, 15)), monday),
+            (day_window(date(2021, 11, 19)), friday),
+            (day_window(date(2021, 11, 29)), friday),
+            (week_window(date(2021, 8, 2)), monday),
+        ]:
+            PostingViewSketch.objects.create(posting_id = 1, window = window, registers = sketch.to_bytes())
+
+        self.assertEqual(rollup_sketches(today, keep_days = 7, keep_weeks = 12), (1, 3))
+
+        week = PostingViewSketch.objects.get(window = week_window(date(2021, 11, 15)))
+
+        self.assertEqual(HyperLogLog.from_bytes(week.registers).count(), 2)
+        self.assertEqual(
+            set(PostingViewSketch.objects.values_list('window', flat = True)),
+            {'week:2021-W46', day_window(date(2021, 11, 29))}
+        )
+
 class CommentTest(TestCase):
     def setUp(self):
         global headers
@@ -205,11 +721,13 @@ class CommentTest(TestCase):
         user1        = User.objects.create(id = 1, email = "user1@gmail.com", password = "abc1234!", name = '박유저')
         user2        = User.objects.create(id = 2, email = "user2@gmail.com", password = "abc1234!", name = '김유저')
         category     = Category.objects.create(id = 1, name = '카테고리')
-        posting1     = Posting.objects.create(id = 1, user_id = 1, category = category, title = '제목', content = '내용')
-        comment1     = Comment.objects.create(id = 1, user_id = 2, posting_id = 1, content = '내용')
+        posting1     = Posting.objects.create(id = 1, user_id = 1, category = category, title = '제목', content = '내용', comment_count = 2)
+        comment1     = Comment.objects.create(id = 1, user_id = 2, posting_id = 1, content = '내용', child_comment_count = 1)
         comment2     = Comment.objects.create(id = 2, user_id = 1, posting_id = 1, content = '내용', parent_comment_id = 1)
 
     def tearDown(self):
+        trending_counter.reset()
+        caches['postings'].clear()
         User.objects.all().delete()
         Category.objects.all().delete()
         Posting.objects.all().delete()
@@ -296,6 +814,68 @@ class CommentTest(TestCase):
             'message' : 'POSTING_DOES_NOT_EXIST'
         })
 
+    def test_commentthreadview_get_first_replies(self):
+        client = Client()
+
+        Comment.objects.bulk_create([
+            Comment(id = comment_id, user_id = 1, posting_id = 1, content = f'대댓글 {comment_id}', parent_comment_id = 1)
+            for comment_id in range(3, 6)
+        ])
+        Comment.objects.filter(id = 1).update(child_comment_count = 4)
+
+        response = client.get('/postings/comments/1/thread?replies=2')
+        comments = response.json()['comment_list']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([comment['comment_id'] for comment in comments], [1])
+        self.assertEqual([reply['child_comment_id'] for reply in comments[0]['child_comment_list']], [2, 3])
+
+    def test_commentthreadview_get_replies_before_recount(self):
+        client = Client()
+
+        # the recount job has not run yet
+        Comment.objects.filter(id = 1).update(child_comment_count = 0)
+
+        comments = client.get('/postings/comments/1/thread').json()['comment_list']
+
+        self.assertEqual([reply['child_comment_id'] for reply in comments[0]['child_comment_list']], [2])
+
+    def test_comment_pages_not_modified_until_comment_changes(self):
+        client = Client()
+
+        comments_etag = client.get('/postings/comments/1')['ETag']
+        replies_etag  = client.get('/postings/comment/1')['ETag']
+
+        self.assertEqual(client.get('/postings/comments/1', HTTP_IF_NONE_MATCH = comments_etag).status_code, 304)
+        self.assertEqual(client.get('/postings/comment/1', HTTP_IF_NONE_MATCH = replies_etag).status_code, 304)
+
+        client.patch('/postings/comment/2', json.dumps({'content' : '수정'}), content_type='application/json', **headers)
+
+        self.assertEqual(client.get('/postings/comments/1', HTTP_IF_NONE_MATCH = comments_etag).status_code, 200)
+        self.assertEqual(client.get('/postings/comment/1', HTTP_IF_NONE_MATCH = replies_etag).status_code, 200)
+
+    def test_commentthreadview_get_invalid_replies(self):
+        client = Client()
+
+        response = client.get('/postings/comments/1/thread?replies=0')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            'message' : 'INVALID_REPLIES'
+        })
+
+    def test_comment_pages_get_invalid_page(self):
+        client = Client()
+
+        for path in ('/postings/comments/1', '/postings/comments/1/thread', '/postings/comment/1'):
+            for page in ('abc', '0', '-1'):
+                response = client.get(f'{path}?page={page}')
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {
+                    'message' : 'INVALID_PAGE'
+                })
+
     def test_commentdetailview_get_success(self):
         client = Client()
 
@@ -323,6 +903,38 @@ class CommentTest(TestCase):
             'message' : 'SUCCESS'
         })
     
+    def test_commentview_post_updates_comment_counts(self):
+        client = Client()
+
+        data = {
+            "content"           : "대댓글 내용",
+            "parent_comment_id" : 1
+        }
+
+        client.post('/postings/comments/1', json.dumps(data), content_type='application/json', **headers)
+        run_pending_jobs()
+
+        self.assertEqual(Posting.objects.get(id = 1).comment_count, 3)
+        self.assertEqual(Comment.objects.get(id = 1).child_comment_count, 2)
+
+    def test_commentdetailview_delete_updates_comment_counts(self):
+        client = Client()
+
+        client.delete('/postings/comment/2', **headers)
+        run_pending_jobs()
+
+        self.assertEqual(Posting.objects.get(id = 1).comment_count, 1)
+        self.assertEqual(Comment.objects.get(id = 1).child_comment_count, 0)
+
+    def test_reconcile_comment_counts(self):
+        Posting.objects.filter(id = 1).update(comment_count = 10)
+        Comment.objects.filter(id = 1).update(child_comment_count = 0)
+
+        call_command('reconcile_comment_counts', stdout = StringIO())
+
+        self.assertEqual(Posting.objects.get(id = 1).comment_count, 2)
+        self.assertEqual(Comment.objects.get(id = 1).child_comment_count, 1)
+
     def test_commentdetailview_patch_success(self):
         client = Client()
 
@@ -335,4 +947,120 @@ class CommentTest(TestCase):
         self.assertEqual(response.status_code, 201)
         self.assertEqual(response.json(), {
             'message' : 'SUCCESS'
-        })
\ No newline at end of file
+        })
+
+    def test_commentdetailview_patch_keeps_concurrent_counts(self):
+        client = Client()
+        stale  = Comment.objects.get(id = 2)
+
+        Comment.objects.filter(id = 2).update(child_comment_count = F('child_comment_count') + 1)
+
+        with patch.object(Comment.objects, 'get', return_value = stale):
+            client.patch('/postings/comment/2', json.dumps({'content' : '댓글 내용 수정'}), content_type='application/json', **headers)
+
+        comment = Comment.objects.get(id = 2)
+
+        self.assertEqual(comment.content, '댓글 내용 수정')
+        self.assertEqual(comment.child_comment_count, 1)
+
+class SeedDataTest(TestCase):
+    def tearDown(self):
+        view_counter.reset()
+        unique_view_counter.reset()
+        trending_counter.reset()
+        caches['postings'].clear()
+
+    def test_seed_data_keeps_counters_consistent(self):
+        call_command('seed_data', users = 3, categories = 2, postings = 10, comments = 30, stdout = StringIO())
+
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(Posting.objects.count(), 10)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertEqual(sum(Posting.objects.values_list('comment_count', flat = True)), 30)
+        self.assertEqual(
+            sum(Comment.objects.values_list('child_comment_count', flat = True)),
+            Comment.objects.filter(parent_comment__isnull = False).count()
+        )
+
+    def test_check_query_plans_finds_no_table_scans(self):
+        call_command('seed_data', users = 3, categories = 2, postings = 10, comments = 30, stdout = StringIO())
+
+        output = StringIO()
+        call_command('check_query_plans', stdout = output)
+
+        self.assertIn('Every hot path is served by an index', output.getvalue())
+
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        global headers
+        access_token = jwt.encode({'id' : 1}, settings.SECRET_KEY, algorithm = settings.ALGORITHM)
+        headers      = {'HTTP_Authorization': access_token}
+        User.objects.create(id = 1, email = "user1@gmail.com", password = "abc1234!", name = '박유저')
+        category     = Category.objects.create(id = 1, name = '카테고리')
+        Posting.objects.create(id = 1, user_id = 1, category = category, title = '제목', content = '내용', comment_count = 2)
+        Comment.objects.create(id = 1, user_id = 1, posting_id = 1, content = '내용', child_comment_count = 1)
+        Comment.objects.create(id = 2, user_id = 1, posting_id = 1, content = '내용', parent_comment_id = 1)
+
+    def tearDown(self):
+        view_counter.reset()
+        unique_view_counter.reset()
+        trending_counter.reset()
+        caches['postings'].clear()
+        User.objects.all().delete()
+        Category.objects.all().delete()
+        Posting.objects.all().delete()
+        Comment.objects.all().delete()
+
+    def test_query_budget_posting_view(self):
+        posting_info = {
+            'title'       : 'test title',
+            'content'     : 'test content',
+            'category_id' : 1
+        }
+
+        self.assertQueryBudget('post', '/postings', json.dumps(posting_info), content_type='application/json', **headers)
+        self.assertQueryBudget('get', '/postings?keyword=test&category_id=1')
+        self.assertQueryBudget('get', '/postings/categories')
+
+    def test_query_budget_posting_param_view(self):
+        self.assertQueryBudget('get', '/postings/1')
+        self.assertQueryBudget('get', '/postings/1', **headers)
+        self.assertQueryBudget('post', '/postings/1', json.dumps({'title' : '수정'}), content_type='application/json', **headers)
+        self.assertQueryBudget('delete', '/postings/1', **headers)
+
+    def test_query_budget_comment_view(self):
+        data = {
+            "content"           : "댓글 내용",
+            "parent_comment_id" : 1
+        }
+
+        self.assertQueryBudget('post', '/postings/comments/1', json.dumps(data), content_type='application/json', **headers)
+        self.assertQueryBudget('get', '/postings/comments/1')
+        self.assertQueryBudget('get', '/postings/comments/1/thread')
+
+    def test_query_budget_comment_detail_view(self):
+        self.assertQueryBudget('get', '/postings/comment/1')
+        self.assertQueryBudget('patch', '/postings/comment/2', json.dumps({'content' : '수정'}), content_type='application/json', **headers)
+        self.assertQueryBudget('delete', '/postings/comment/2', **headers)
+
+    def test_query_budget_comment_detail_view_delete_reply(self):
+        self.assertQueryBudget('delete', '/postings/comment/2', **headers)
+
+    def test_query_budget_comment_detail_view_delete_with_replies(self):
+        self.assertQueryBudget('delete', '/postings/comment/1', **headers)
+
+class UpdatedAtMigrationTest(TransactionTestCase):
+    def tearDown(self):
+        call_command('migrate', verbosity = 0)
+
+    def test_date_updated_at_converted_to_datetime(self):
+        call_command('migrate', 'postings', '0004_comment_thread_indexes', verbosity = 0)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO categories (id, name, created_at, updated_at) VALUES (1, '카테고리', '2021-11-03', '2021-11-05')"
+            )
+
+        call_command('migrate', verbosity = 0)
+
+        self.assertEqual(Category.objects.get(id = 1).updated_at.replace(tzinfo = None), datetime(2021, 11, 5))
@@ -0,0 +1,62 @@
+from django.conf          import settings
+from django.db.models     import OuterRef, Q, Subquery
+
+from postings.models      import Comment
+from postings.serializers import CHILD_COMMENT_FIELDS, COMMENT_FIELDS, format_dates, project
+
+THREAD_ORDER = ('created_at', 'id')
+
+def get_reply_limit(value):
+    """
+    Parses the ``replies`` query parameter, raising ValueError unless it is a positive integer.
+    """
+    if value is None:
+        return settings.COMMENT_THREAD_REPLIES
+
+    reply_limit = int(value)
+
+    if reply_limit < 1:
+        raise ValueError(value)
+
+    return min(reply_limit, settings.COMMENT_THREAD_MAX_REPLIES)
+
+def load_thread(posting_id, offset, limit, reply_limit):
+    """
+    Returns one page of a posting's top-level comments, each with its first ``reply_limit`` replies.
+
+    At most two queries: the page annotated with the sort key of each comment's
+    ``reply_limit``-th reply (an index seek on comments_parent_created_idx), then
+    every reply up to those keys, so no more than ``reply_limit`` rows per comment are read.
+    """
+    replies  = Comment.objects.filter(parent_comment_id = OuterRef('id')).order_by(*THREAD_ORDER)
+    cutoff   = slice(reply_limit - 1, reply_limit)
+    comments = list(
+        project(Comment.objects.filter(posting_id = posting_id, parent_comment_id = None).order_by(*THREAD_ORDER), COMMENT_FIELDS)
+        .annotate(
+            cutoff_id         = Subquery(replies.values('id')[cutoff]),
+            cutoff_created_at = Subquery(replies.values('created_at')[cutoff]),
+        )[offset : limit]
+    )
+
+    reply_filter = Q()
+
+    for comment in comments:
+        comment['child_comment_list'] = []
+        cutoff_id         = comment.pop('cutoff_id')
+        cutoff_created_at = comment.pop('cutoff_created_at')
+
+        first_replies = Q(parent_comment_id = comment['comment_id'])
+
+        if cutoff_id is not None:
+            first_replies &= Q(created_at__lt = cutoff_created_at) | Q(created_at = cutoff_created_at, id__lte = cutoff_id)
+
+        reply_filter |= first_replies
+
+    if reply_filter:
+        by_id = {comment['comment_id'] : comment for comment in comments}
+        rows  = project(Comment.objects.filter(reply_filter).order_by(*THREAD_ORDER), dict(CHILD_COMMENT_FIELDS, parent_comment_id = 'parent_comment_id'))
+
+        for reply in format_dates(rows, 'child_comment_created_at'):
+            by_id[reply.pop('parent_comment_id')]['child_comment_list'].append(reply)
+
+    return list(format_dates(comments, 'comment_created_at'))
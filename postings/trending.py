@@ -0,0 +1,220 @@
+import atexit, heapq, logging, math, time
+
+from datetime             import datetime, timedelta
+
+from django.conf          import settings
+from django.core.cache    import caches
+from django.utils         import timezone
+
+from core.routers         import use_primary
+from postings.counters    import BufferedCounter
+from postings.models      import Category, Comment, Posting
+from postings.serializers import format_dates, project
+
+logger = logging.getLogger(__name__)
+
+# ranking over every category
+ALL_CATEGORIES = 'all'
+
+TRENDING_FIELDS = {
+    'id'            : 'id',
+    'title'         : 'title',
+    'category_id'   : 'category_id',
+    'views'         : 'views',
+    'comment_count' : 'comment_count',
+    'created_at'    : 'created_at',
+    'author_id'     : 'user_id',
+    'author'        : 'user__name',
+}
+
+def get_trending_limit(value):
+    """
+    Parses the ``limit`` query parameter, raising ValueError unless it is a positive integer.
+    """
+    if value is None:
+        return settings.TRENDING_PAGE_SIZE
+
+    limit = int(value)
+
+    if limit < 1:
+        raise ValueError(value)
+
+    return min(limit, settings.TRENDING_SIZE)
+
+def add_logs(first, second):
+    """
+    ``log2(2 ** first + 2 ** second)`` without leaving the log scale.
+    """
+    if first is None:
+        return second
+
+    high, low = max(first, second), min(first, second)
+
+    return high + math.log2(1 + 2 ** (low - high))
+
+class TrendingRanking:
+    """
+    Top ``size`` postings per category by exponentially decayed score, kept in a cache
+    all processes share, so every process adds its own traffic to the same rankings.
+
+    An event of weight ``w`` at time ``t`` adds ``w * 2 ** (t / half_life)``, so every
+    score decays by half each ``half_life`` relative to newer events without ever being
+    rewritten. Scores are stored as base-2 logarithms to stay within float range.
+    A ranking is a list of ``(posting_id, log score)`` sorted best first, so reading
+    the top N is a slice. Concurrent flushes into the same category may drop each
+    other's updates, because a ranking is read and written back without a lock.
+    """
+    def __init__(self, cache_alias, size, half_life):
+        self.cache_alias = cache_alias
+        self.size        = size
+        self.half_life   = half_life
+
+    def key(self, category_id):
+        return f'trending:{category_id}'
+
+    def mark_rebuilt(self, timestamp):
+        caches[self.cache_alias].set('trending:rebuilt_at', timestamp, timeout = None)
+
+    def rebuilt_at(self):
+        """
+        Returns when the last rebuild started reading stored data, 0 if there was none.
+        """
+        return caches[self.cache_alias].get('trending:rebuilt_at', 0)
+
+    def log_weight(self, weight, timestamp):
+        return math.log2(weight) + timestamp / self.half_life
+
+    def trim(self, scores):
+        return heapq.nlargest(self.size, scores.items(), key = lambda item : (item[1], -item[0]))
+
+    def record(self, events, timestamp = None):
+        """
+        Adds ``events`` ({posting_id : (category_id, weight)}) to the rankings of their
+        category and of ``ALL_CATEGORIES``.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        updates   = {}
+
+        for posting_id, (category_id, weight) in events.items():
+            for ranking_id in (category_id, ALL_CATEGORIES):
+                updates.setdefault(ranking_id, {})[posting_id] = self.log_weight(weight, timestamp)
+
+        cache    = caches[self.cache_alias]
+        rankings = cache.get_many([self.key(ranking_id) for ranking_id in updates])
+        changed  = {}
+
+        for ranking_id, additions in updates.items():
+            scores = dict(rankings.get(self.key(ranking_id), []))
+
+            for posting_id, log_weight in additions.items():
+                scores[posting_id] = add_logs(scores.get(posting_id), log_weight)
+
+            changed[self.key(ranking_id)] = self.trim(scores)
+
+        cache.set_many(changed, timeout = None)
+
+    def replace(self, scores_by_ranking):
+        """
+        Replaces whole rankings with ``scores_by_ranking`` ({ranking_id : {posting_id : log score}}).
+        """
+        caches[self.cache_alias].set_many(
+            {self.key(ranking_id) : self.trim(scores) for ranking_id, scores in scores_by_ranking.items()},
+            timeout = None
+        )
+
+    def top(self, category_id, limit, timestamp = None):
+        """
+        Returns up to ``limit`` ``(posting_id, score)`` pairs, scores decayed to ``timestamp``.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        ranking   = caches[self.cache_alias].get(self.key(category_id), [])
+        now       = timestamp / self.half_life
+
+        return [(posting_id, 2 ** (log_score - now)) for posting_id, log_score in ranking[:limit]]
+
+def flush_trending(pending, since):
+    # a rebuild counted these from the stored views and comments, other processes may still buffer them
+    if since < trending.rebuilt_at():
+        logger.info('Dropped %d trending hits buffered before the last rebuild', len(pending))
+
+        return
+
+    # postings created moments ago may not have reached the replicas yet
+    with use_primary():
+        categories = dict(Posting.objects.filter(id__in = list(pending)).values_list('id', 'category_id'))
+
+    trending.record({
+        posting_id : (categories[posting_id], weight)
+        for posting_id, weight in pending.items() if posting_id in categories
+    })
+
+def load_trending(category_id, limit):
+    """
+    Returns the ``posting_list`` rows of the current top ``limit`` postings, best first.
+    """
+    ranked   = trending.top(category_id, limit)
+    postings = Posting.objects.filter(id__in = [posting_id for posting_id, _ in ranked])
+
+    if category_id != ALL_CATEGORIES:
+        # a posting moved to another category stays in the old ranking until it decays away
+        postings = postings.filter(category_id = category_id)
+
+    rows = {row['id'] : row for row in format_dates(project(postings, TRENDING_FIELDS), 'created_at')}
+
+    return [dict(rows[posting_id], score = round(score, 3)) for posting_id, score in ranked if posting_id in rows]
+
+def day_timestamp(day):
+    # stored dates are local to TIME_ZONE
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()), timezone.get_default_timezone()).timestamp()
+
+def rebuild_trending(now = None):
+    """
+    Recomputes every ranking from stored data: the views of a posting are counted on the
+    day it was created and each comment on its own day, as ``created_at`` only keeps
+    the date. Activity older than ``TRENDING_REBUILD_HALF_LIVES`` half-lives is
+    negligible and skipped.
+
+    Every process drops trending hits it buffered before the rebuild started, as the
+    rebuild already counts them, together with the hits that joined them later.
+    """
+    started = time.time()
+    now     = now or timezone.now()
+    since   = (now - timedelta(seconds = trending.half_life * settings.TRENDING_REBUILD_HALF_LIVES)).date()
+    scores  = {}
+
+    postings = Posting.objects.filter(created_at__gte = since).values_list('id', 'category_id', 'views', 'created_at')
+
+    for posting_id, category_id, views, created_at in postings.iterator():
+        scores[posting_id] = [category_id, None]
+
+        if views:
+            scores[posting_id][1] = trending.log_weight(views * settings.TRENDING_VIEW_WEIGHT, day_timestamp(created_at))
+
+    comments = Comment.objects.filter(created_at__gte = since).values_list('posting_id', 'posting__category_id', 'created_at')
+
+    for posting_id, category_id, created_at in comments.iterator():
+        entry    = scores.setdefault(posting_id, [category_id, None])
+        entry[1] = add_logs(entry[1], trending.log_weight(settings.TRENDING_COMMENT_WEIGHT, day_timestamp(created_at)))
+
+    rankings = {category_id : {} for category_id in Category.objects.values_list('id', flat = True)}
+    rankings[ALL_CATEGORIES] = {}
+
+    for posting_id, (category_id, log_score) in scores.items():
+        if log_score is not None:
+            rankings.setdefault(category_id, {})[posting_id] = log_score
+            rankings[ALL_CATEGORIES][posting_id]             = log_score
+
+    trending.replace(rankings)
+    trending.mark_rebuilt(started)
+
+    return sum(1 for _, log_score in scores.values() if log_score is not None)
+
+trending = TrendingRanking(settings.TRENDING_CACHE, settings.TRENDING_SIZE, settings.TRENDING_HALF_LIFE)
+
+trending_counter = BufferedCounter(
+    flush_trending,
+    threshold = settings.TRENDING_FLUSH_THRESHOLD,
+    interval  = settings.TRENDING_FLUSH_INTERVAL
+)
+
+atexit.register(trending_counter.flush)
@@ -0,0 +1,148 @@
+import atexit
+
+from datetime             import date, timedelta
+
+from django.conf          import settings
+from django.db            import transaction
+
+from core.jobs            import enqueue
+from postings.counters    import BufferedCounter
+from postings.hyperloglog import HyperLogLog, hash_value
+from postings.models      import Posting, PostingViewSketch
+
+ALL_TIME_WINDOW = 'all'
+
+def day_window(day):
+    return f'day:{day.isoformat()}'
+
+def week_window(day):
+    year, week, _ = day.isocalendar()
+
+    return f'week:{year}-W{week:02d}'
+
+def parse_window(window):
+    """
+    Returns ``(kind, first day)`` of a window name, or ``(ALL_TIME_WINDOW, None)``.
+    """
+    kind, _, value = window.partition(':')
+
+    if kind == 'day':
+        return kind, date.fromisoformat(value)
+
+    if kind == 'week':
+        year, week = value.split('-W')
+
+        return kind, date.fromisocalendar(int(year), int(week), 1)
+
+    return ALL_TIME_WINDOW, None
+
+def viewer_hash(request, user_id):
+    if user_id:
+        return hash_value(f'user:{user_id}')
+
+    return hash_value(f'anonymous:{request.META.get("REMOTE_ADDR")}:{request.META.get("HTTP_USER_AGENT", "")}')
+
+def merge_sketches(additions):
+    """
+    Merges ``additions`` ({(posting_id, window) : HyperLogLog}) into the stored sketches
+    of the same keys, creating missing rows. Returns the merged sketches.
+    """
+    stored = {
+        (sketch.posting_id, sketch.window) : sketch
+        for sketch in PostingViewSketch.objects.select_for_update().filter(
+            posting_id__in = {posting_id for posting_id, _ in additions},
+            window__in     = {window for _, window in additions},
+        )
+    }
+    merged, created, updated = {}, [], []
+
+    for (posting_id, window), addition in additions.items():
+        sketch = stored.get((posting_id, window))
+
+        if sketch is None:
+            merged[posting_id, window] = addition
+            created.append(PostingViewSketch(posting_id = posting_id, window = window, registers = addition.to_bytes()))
+
+        else:
+            merged[posting_id, window] = HyperLogLog.from_bytes(sketch.registers).merge(addition)
+            sketch.registers           = merged[posting_id, window].to_bytes()
+            updated.append(sketch)
+
+    PostingViewSketch.objects.bulk_create(created)
+    PostingViewSketch.objects.bulk_update(updated, ['registers'])
+
+    return merged
+
+def flush_unique_views(pending, day = None):
+    """
+    Adds the buffered ``(posting_id, viewer hash)`` pairs to the sketch of ``day``, today
+    by default, and the all-time sketch of every posting and stores the all-time estimate
+    in ``Posting.unique_views``.
+    """
+    sketches    = {}
+    posting_ids = set(Posting.objects.filter(id__in = {posting_id for posting_id, _ in pending}).values_list('id', flat = True))
+    windows     = (day_window(day or date.today()), ALL_TIME_WINDOW)
+
+    for posting_id, hashed in pending:
+        if posting_id in posting_ids:
+            for window in windows:
+                sketches.setdefault((posting_id, window), HyperLogLog()).add_hash(hashed)
+
+    if not sketches:
+        return
+
+    with transaction.atomic():
+        merged = merge_sketches(sketches)
+
+        Posting.objects.bulk_update(
+            [Posting(id = posting_id, unique_views = merged[posting_id, ALL_TIME_WINDOW].count()) for posting_id in posting_ids],
+            ['unique_views']
+        )
+
+def enqueue_unique_views(pending, since):
+    """
+    Hands buffered ``(posting_id, viewer hash)`` pairs to a ``flush_unique_views`` job, one
+    insert in the request instead of merging sketches. The day the batch started goes
+    along, so a job run after midnight still adds them to the day they were seen.
+    """
+    day = date.fromtimestamp(since)
+
+    return enqueue('flush_unique_views', day = day.isoformat(), views = [[posting_id, hashed] for posting_id, hashed in pending])
+
+def rollup_sketches(today, keep_days, keep_weeks):
+    """
+    Folds day sketches older than ``keep_days`` into their week and drops week sketches
+    older than ``keep_weeks``, so every posting keeps a bounded number of sketches.
+    Everything dropped is already part of the all-time sketch.
+    """
+    day_cutoff  = today - timedelta(days = keep_days)
+    week_cutoff = today - timedelta(weeks = keep_weeks)
+    weeks       = {}
+    expired     = []
+
+    for sketch in PostingViewSketch.objects.exclude(window = ALL_TIME_WINDOW).iterator():
+        kind, first_day = parse_window(sketch.window)
+
+        if kind == 'day' and first_day < day_cutoff:
+            week = weeks.setdefault((sketch.posting_id, week_window(first_day)), HyperLogLog())
+            week.merge(HyperLogLog.from_bytes(sketch.registers))
+            expired.append(sketch.id)
+
+        elif kind == 'week' and first_day + timedelta(days = 6) < week_cutoff:
+            expired.append(sketch.id)
+
+    with transaction.atomic():
+        if weeks:
+            merge_sketches(weeks)
+
+        PostingViewSketch.objects.filter(id__in = expired).delete()
+
+    return len(weeks), len(expired)
+
+unique_view_counter = BufferedCounter(
+    enqueue_unique_views,
+    threshold = settings.UNIQUE_VIEWS_FLUSH_THRESHOLD,
+    interval  = settings.UNIQUE_VIEWS_FLUSH_INTERVAL
+)
+
+atexit.register(unique_view_counter.flush)
@@ -2,14 +2,20 @@ from django.urls    import path
 
 from postings.views import (
     PostingView,
+    CategoryView,
+    TrendingView,
     PostingParamView,
     CommentView,
+    CommentThreadView,
     CommentDetailView,
 )
 
 urlpatterns =[
     path('', PostingView.as_view()), 
+    path('/categories', CategoryView.as_view()),
+    path('/trending', TrendingView.as_view()),
     path('/<int:posting_id>', PostingParamView.as_view()),
     path('/comments/<int:posting_id>', CommentView.as_view()),
+    path('/comments/<int:posting_id>/thread', CommentThreadView.as_view()),
     path('/comment/<int:comment_id>', CommentDetailView.as_view()),  
 ]
\ No newline at end of file
@@ -1,15 +1,54 @@
 import json
 
-from django.http      import JsonResponse
-from json.decoder     import JSONDecodeError
-from django.views     import View
-from django.db.models import Q
-
-from postings.models  import Category, Posting, Comment
-from users.models     import User
-from users.utils      import login_decorator
+from django.conf                  import settings
+from django.http                  import HttpResponse, JsonResponse, StreamingHttpResponse
+from json.decoder                 import JSONDecodeError
+from django.views                 import View
+from django.db                    import IntegrityError, transaction
+from django.db.models             import F, Q
+from django.utils.decorators      import method_decorator
+from django.views.decorators.http import etag
+
+from core.compression             import cache_compressed
+from core.jobs                    import enqueue
+from core.renderers               import FastJsonResponse
+from postings.cache               import get_posting_info
+from postings.categories          import categories_etag, category_registry
+from postings.conditional         import comment_condition, posting_condition, posting_validators, touch_posting
+from postings.counters            import view_counter
+from postings.dedup               import viewed_filter
+from postings.models              import Posting, Comment
+from postings.pagination          import InvalidCursor, get_page, get_page_size, keyset_paginate, seek
+from postings.search              import search_postings
+from postings.serializers         import CHILD_COMMENT_FIELDS, COMMENT_FIELDS, POSTING_FIELDS, format_dates, project
+from postings.streaming           import NDJSON_CONTENT_TYPE, stream_json_list, stream_ndjson, wants_ndjson
+from postings.threads             import THREAD_ORDER, get_reply_limit, load_thread
+from postings.trending            import ALL_CATEGORIES, get_trending_limit, load_trending, trending_counter
+from postings.unique_views        import unique_view_counter, viewer_hash
+from users.models                 import User
+from users.utils                  import get_user_id, login_decorator
+
+def load_posting_info(posting_id):
+    posting = Posting.objects.select_related('user').get(id = posting_id)
+
+    posting_info = {
+        'id'            : posting.id,
+        'title'         : posting.title,
+        'views'         : posting.views,
+        'unique_views'  : posting.unique_views,
+        'content'       : posting.content,
+        'author_id'     : posting.user.id,
+        'author'        : posting.user.name,
+        'comment_count' : posting.comment_count
+    }
+
+    return posting_info, posting.version
 
 class PostingView(View):
+    query_budget  = {'get' : 3, 'post' : 5}
+    replica_reads = ('get',)
+
+
     @login_decorator
     def post(self, request):
         try:
@@ -17,15 +56,24 @@ class PostingView(View):
             user        = request.user
             category_id = data['category_id']
 
-            if not Category.objects.filter(id = category_id).exists():
+            if not category_registry.exists(category_id):
                 return JsonResponse({"message" : "CATEGORY_DOES_NOT_EXIST"}, status = 404)
 
-            Posting.objects.create(
-                category_id = category_id,
-                user        = user,
-                title       = data['title'],
-                content     = data['content']
-            )
+            try:
+                with transaction.atomic():
+                    posting = Posting.objects.create(
+                        category_id = category_id,
+                        user_id     = user.id,
+                        title       = data['title'],
+                        content     = data['content']
+                    )
+                    enqueue('index_posting', posting_id = posting.id)
+
+            except IntegrityError:
+                # deleted through another process since the registry last read the table
+                category_registry.clear()
+
+                return JsonResponse({"message" : "CATEGORY_DOES_NOT_EXIST"}, status = 404)
 
             return JsonResponse({'message' : 'SUCCESS'}, status = 201)
 
@@ -39,51 +87,104 @@ class PostingView(View):
         posting_filter = Q()
 
         if keyword:
-            posting_filter.add(Q(title__icontains = keyword) | Q(content__icontains = keyword), Q.AND)
+            posting_filter.add(search_postings(keyword), Q.AND)
         
         if category_id:
-            if not Category.objects.filter(id = category_id).exists():
+            if not category_registry.exists(category_id):
                 return JsonResponse({"message" : "CATEGORY_DOES_NOT_EXIST"}, status = 404)
             
-            posting_filter.add(Q(category_id = category_id))
+            posting_filter.add(Q(category_id = category_id), Q.AND)
         
-        postings = Posting.objects.select_related('user').filter(posting_filter)
-
-        posting_list = [{
-            'id'          : posting.id,
-            'title'       : posting.title,
-            'content'     : posting.content,
-            'views'       : posting.views,
-            'created_at'  : posting.created_at.strftime("%Y/%m/%d"),
-            'author_id'   : posting.user.id,
-            'author'      : posting.user.name,     
-        }for posting in postings]
-
-        return JsonResponse({'posting_list' : posting_list}, status = 200)
+        postings = Posting.objects.filter(posting_filter)
+
+        if request.GET.get('stream') == 'true' or wants_ndjson(request):
+            try:
+                postings = seek(postings, request.GET.get('cursor'))
+
+            except InvalidCursor:
+                return JsonResponse({'message' : 'INVALID_CURSOR'}, status = 400)
+
+            rows = format_dates(
+                project(postings, POSTING_FIELDS).iterator(chunk_size = settings.POSTING_STREAM_CHUNK_SIZE),
+                'created_at'
+            )
+
+            if wants_ndjson(request):
+                return StreamingHttpResponse(stream_ndjson(rows), content_type = NDJSON_CONTENT_TYPE)
+
+            return StreamingHttpResponse(stream_json_list('posting_list', rows), content_type = 'application/json')
+
+        try:
+            page_size = get_page_size(request.GET.get('limit'))
+
+        except ValueError:
+            return JsonResponse({'message' : 'INVALID_LIMIT'}, status = 400)
+
+        try:
+            postings, next_cursor = keyset_paginate(project(postings, POSTING_FIELDS), request.GET.get('cursor'), page_size)
+
+        except InvalidCursor:
+            return JsonResponse({'message' : 'INVALID_CURSOR'}, status = 400)
+
+        posting_list = list(format_dates(postings, 'created_at'))
+
+        return FastJsonResponse({'posting_list' : posting_list, 'next' : next_cursor}, status = 200)
     
+class CategoryView(View):
+    query_budget = {'get' : 1}
+
+
+    @method_decorator(etag(categories_etag))
+    def get(self, request):
+        listing, _ = category_registry.get_listing()
+
+        return cache_compressed(HttpResponse(listing, content_type = 'application/json', status = 200))
+
+class TrendingView(View):
+    query_budget  = {'get' : 3}
+    replica_reads = ('get',)
+
+
+    def get(self, request):
+        category_id = request.GET.get('category_id')
+
+        if category_id and not category_registry.exists(category_id):
+            return JsonResponse({'message' : 'CATEGORY_DOES_NOT_EXIST'}, status = 404)
+
+        try:
+            limit = get_trending_limit(request.GET.get('limit'))
+
+        except ValueError:
+            return JsonResponse({'message' : 'INVALID_LIMIT'}, status = 400)
+
+        posting_list = load_trending(int(category_id) if category_id else ALL_CATEGORIES, limit)
+
+        return FastJsonResponse({'posting_list' : posting_list}, status = 200)
+
 class PostingParamView(View) :
+    query_budget  = {'get' : 2, 'post' : 6, 'delete' : 8}
+    replica_reads = ('get',)
+
+
+    @method_decorator(posting_condition)
     def get(self, request, posting_id):
         try:
-            if not Posting.objects.filter(id = posting_id).exists():
+            user_id    = get_user_id(request)
+            validators = posting_validators(request, posting_id)
+
+            if validators is None:
                 return JsonResponse({'message' : 'POSTING_DOES_NOT_EXIST'}, status = 404)
 
-            user_id = request.session.get('user')
-            posting = Posting.objects.select_related('user').prefetch_related('comment_set').get(id = posting_id)
-
-            posting_info = {
-                'id'            : posting.id,
-                'title'         : posting.title,
-                'views'         : posting.views,
-                'content'       : posting.content,
-                'author_id'     : posting.user.id,
-                'author'        : posting.user.name,
-                'comment_count' : posting.comment_set.count()
-            }
+            posting_info = get_posting_info(posting_id, validators['version'], load_posting_info)
+            posting_info = dict(posting_info, views = validators['views'], unique_views = validators['unique_views'])
             
-            if not user_id :
-                posting.views += 1
-                posting.save()
+            if not user_id or not viewed_filter.seen_or_add(user_id, posting_id):
+                view_counter.add(posting_id)
+                trending_counter.add(posting_id, settings.TRENDING_VIEW_WEIGHT)
+
+            unique_view_counter.add((posting_id, viewer_hash(request, user_id)))
             
+            # the live view count changes the body on almost every read, its compressed bytes are not worth caching
             return JsonResponse({'posting_info' : posting_info}, status = 200)
         
         except Posting.DoesNotExist:
@@ -102,12 +203,17 @@ class PostingParamView(View) :
             user    = request.user
             posting = Posting.objects.get(id = posting_id)
 
-            if user != posting.user:
+            if user.id != posting.user_id:
                 return JsonResponse({'message' : 'INVALID_USER'}, status = 401)
 
             posting.title   = data.get('title', posting.title)
             posting.content = data.get('content', posting.content)
-            posting.save()
+            posting.version = F('version') + 1
+
+            # only the edited columns, counters read earlier in the request may be stale by now
+            with transaction.atomic():
+                posting.save(update_fields = ['title', 'content', 'version', 'updated_at'])
+                enqueue('index_posting', posting_id = posting.id)
 
             return JsonResponse({'message' : 'SUCCESS'}, status=201)
         
@@ -123,7 +229,7 @@ class PostingParamView(View) :
             user    = request.user
             posting = Posting.objects.get(id = posting_id)
 
-            if user != posting.user:
+            if user.id != posting.user_id:
                 return JsonResponse({'message' : 'INVALID_USER'}, status = 401)
 
             posting.delete()
@@ -134,6 +240,10 @@ class PostingParamView(View) :
             return JsonResponse({'message' : 'POSTING_DOES_NOT_EXIST'}, status = 404)
 
 class CommentView(View):
+    query_budget  = {'get' : 3, 'post' : 6}
+    replica_reads = ('get',)
+
+
     @login_decorator
     def post(self, request, posting_id):
         try:
@@ -149,12 +259,18 @@ class CommentView(View):
                 if not Comment.objects.filter(id = parent_comment_id).exists():
                     return JsonResponse({'message' : 'COMMENT_DOES_NOT_EXIST'}, status = 404)
 
-            Comment.objects.create(
-                user              = user,
-                posting_id        = posting_id,
-                content           = content,
-                parent_comment_id = parent_comment_id
-                )
+            with transaction.atomic():
+                Comment.objects.create(
+                    user_id           = user.id,
+                    posting_id        = posting_id,
+                    content           = content,
+                    parent_comment_id = parent_comment_id
+                    )
+                # the counts follow in a job, the version changes now so cached pages and ETags do
+                touch_posting([posting_id])
+                enqueue('recount_comments', posting_id = posting_id, parent_comment_id = parent_comment_id)
+
+            trending_counter.add(posting_id, settings.TRENDING_COMMENT_WEIGHT)
             
             return JsonResponse({'message' : 'SUCCESS'}, status = 201)
         
@@ -164,46 +280,81 @@ class CommentView(View):
         except JSONDecodeError:
             return JsonResponse({'message' : 'JSON_DECODE_ERROR'}, status = 400)
     
+    @method_decorator(posting_condition)
     def get(self, request, posting_id):
         if not Posting.objects.filter(id = posting_id).exists():
             return JsonResponse({'message' : 'POSTING_DOES_NOT_EXIST'}, status = 404)
         
-        page      = int(request.GET.get('page', 1))
+        try:
+            page = get_page(request.GET.get('page'))
+
+        except ValueError:
+            return JsonResponse({'message' : 'INVALID_PAGE'}, status = 400)
+
         page_size = 5
         limit     = int(page_size * page)
         offset    = int(limit - page_size)
 
-        comments     = Comment.objects.select_related('user').filter(posting_id = posting_id, parent_comment_id = None).prefetch_related('child_comments')[offset : limit]
-        comment_list = [{
-            'comment_id'          : comment.id,
-            'comment_author'      : comment.user.name,
-            'comment_content'     : comment.content,
-            'comment_created_at'  : comment.created_at.strftime("%Y/%m/%d"),
-            'child_comment_count' : comment.child_comments.count()
-        }for comment in comments]
+        comments     = project(Comment.objects.filter(posting_id = posting_id, parent_comment_id = None).order_by(*THREAD_ORDER), COMMENT_FIELDS)[offset : limit]
+        comment_list = list(format_dates(comments, 'comment_created_at'))
         
-        return JsonResponse({'comment_list' : comment_list}, status = 200)
+        return FastJsonResponse({'comment_list' : comment_list}, status = 200)
+
+class CommentThreadView(View):
+    query_budget  = {'get' : 4}
+    replica_reads = ('get',)
+
+
+    @method_decorator(posting_condition)
+    def get(self, request, posting_id):
+        if not Posting.objects.filter(id = posting_id).exists():
+            return JsonResponse({'message' : 'POSTING_DOES_NOT_EXIST'}, status = 404)
+
+        try:
+            reply_limit = get_reply_limit(request.GET.get('replies'))
+
+        except ValueError:
+            return JsonResponse({'message' : 'INVALID_REPLIES'}, status = 400)
+
+        try:
+            page = get_page(request.GET.get('page'))
+
+        except ValueError:
+            return JsonResponse({'message' : 'INVALID_PAGE'}, status = 400)
+
+        page_size = 5
+        limit     = int(page_size * page)
+        offset    = int(limit - page_size)
+
+        comment_list = load_thread(posting_id, offset, limit, reply_limit)
+
+        return FastJsonResponse({'comment_list' : comment_list}, status = 200)
 
 class CommentDetailView(View):
+    query_budget  = {'get' : 4, 'patch' : 5, 'delete' : 8}
+    replica_reads = ('get',)
+
+
+    @method_decorator(comment_condition)
     def get(self, request, comment_id):
         try:
             if not Comment.objects.filter(id = comment_id).exists():
                 return JsonResponse({'message' : 'COMMENT_DOES_NOT_EXIST'}, status = 404)
             
-            page      = int(request.GET.get('page', 1))
+            try:
+                page = get_page(request.GET.get('page'))
+
+            except ValueError:
+                return JsonResponse({'message' : 'INVALID_PAGE'}, status = 400)
+
             page_size = 5
             limit     = int(page_size * page)
             offset    = int(limit - page_size)
 
-            comment            = Comment.objects.prefetch_related('child_comments__user').get(id = comment_id)
-            child_comment_list = [{
-                'child_comment_id'         : child_comment.id,
-                'child_comment_author'     : child_comment.user.name,
-                'child_comment_content'    : child_comment.content,
-                'child_comment_created_at' : child_comment.created_at.strftime("%Y/%m/%d"),
-            }for child_comment in comment.child_comments.all()[offset : limit]]
+            child_comments     = project(Comment.objects.filter(parent_comment_id = comment_id).order_by(*THREAD_ORDER), CHILD_COMMENT_FIELDS)[offset : limit]
+            child_comment_list = list(format_dates(child_comments, 'child_comment_created_at'))
 
-            return JsonResponse({'child_comment_list' : child_comment_list}, status = 200)
+            return FastJsonResponse({'child_comment_list' : child_comment_list}, status = 200)
         
         except Comment.DoesNotExist:
             return JsonResponse({'message' : 'COMMENT_DOES_NOT_EXIST'}, status = 404)
@@ -220,10 +371,16 @@ class CommentDetailView(View):
             
             comment = Comment.objects.get(id = comment_id)
 
-            if user != comment.user:
+            if user.id != comment.user_id:
                 return JsonResponse({'message' : 'INVALID_USER'}, status = 401)
 
-            comment.delete()
+            # replies of the deleted comment are re-parented to the top level by SET_NULL,
+            # the recount keeps them on the posting and drops the deleted row
+            with transaction.atomic():
+                comment.delete()
+                touch_posting([comment.posting_id])
+                enqueue('recount_comments', posting_id = comment.posting_id, parent_comment_id = comment.parent_comment_id)
+
             return JsonResponse({'message' : 'SUCCESS'}, status = 200)
         
         except Comment.DoesNotExist:
@@ -243,11 +400,14 @@ class CommentDetailView(View):
             
             comment = Comment.objects.get(id = comment_id)
 
-            if user != comment.user:
+            if user.id != comment.user_id:
                 return JsonResponse({'message' : 'INVALID_USER'}, status = 401)
 
             comment.content = data.get('content', comment.content)
-            comment.save()
+
+            with transaction.atomic():
+                comment.save(update_fields = ['content', 'updated_at'])
+                touch_posting([comment.posting_id])
 
             return JsonResponse({'message' : 'SUCCESS'}, status = 201)
         
@@ -0,0 +1,101 @@
+import threading, time, bcrypt
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+
+from django.conf        import settings
+
+from core.metrics       import metrics
+
+class HashingPoolSaturated(Exception):
+  pass
+
+def hash_password(password, rounds):
+  return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def check_password(password, hashed_password):
+  return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+def get_rounds(hashed_password):
+  return int(hashed_password.split('$')[2])
+
+class PasswordHasher:
+  """
+  Runs bcrypt on a bounded thread or process pool instead of the request thread.
+
+  At most ``max_workers + max_queue`` calls may be running or waiting at once;
+  anything beyond that fails fast with HashingPoolSaturated.
+  """
+  def __init__(self, kind, max_workers, max_queue, timeout):
+    self.kind        = kind
+    self.max_workers = max_workers
+    self.timeout     = timeout
+    self.slots       = threading.BoundedSemaphore(max_workers + max_queue)
+    self.lock        = threading.Lock()
+    self.executor    = None
+    self.duration    = 0.0
+
+  def get_executor(self):
+    with self.lock:
+      if self.executor is None:
+        if self.kind == 'process':
+          self.executor = ProcessPoolExecutor(max_workers = self.max_workers)
+        else:
+          self.executor = ThreadPoolExecutor(max_workers = self.max_workers, thread_name_prefix = 'bcrypt')
+
+      return self.executor
+
+  def submit(self, func, *args):
+    if not self.slots.acquire(blocking = False):
+      metrics.inc('bcrypt_rejected_total', {'operation' : func.__name__})
+      raise HashingPoolSaturated()
+
+    started = time.perf_counter()
+
+    try:
+      future = self.get_executor().submit(func, *args)
+
+    except Exception:
+      self.slots.release()
+      raise
+
+    future.add_done_callback(lambda future: self.slots.release())
+
+    try:
+      result = future.result(timeout = self.timeout)
+
+    except TimeoutError:
+      metrics.inc('bcrypt_rejected_total', {'operation' : func.__name__})
+      raise HashingPoolSaturated()
+
+    finally:
+      metrics.observe('bcrypt_duration_seconds', time.perf_counter() - started, {'operation' : func.__name__})
+
+    self.record_duration(time.perf_counter() - started)
+
+    return result
+
+  def record_duration(self, duration):
+    with self.lock:
+      self.duration = duration if not self.duration else self.duration + 0.2 * (duration - self.duration)
+
+  def expected_duration(self):
+    """
+    Moving average of recent bcrypt calls, the work a sign in or sign up spends on hashing.
+    """
+    return self.duration
+
+  def hash(self, password):
+    return self.submit(hash_password, password, settings.BCRYPT_ROUNDS)
+
+  def check(self, password, hashed_password):
+    return self.submit(check_password, password, hashed_password)
+
+  def needs_rehash(self, hashed_password):
+    return get_rounds(hashed_password) != settings.BCRYPT_ROUNDS
+
+password_hasher = PasswordHasher(
+  kind        = settings.BCRYPT_POOL_KIND,
+  max_workers = settings.BCRYPT_POOL_WORKERS,
+  max_queue   = settings.BCRYPT_POOL_QUEUE_SIZE,
+  timeout     = settings.BCRYPT_POOL_TIMEOUT
+)
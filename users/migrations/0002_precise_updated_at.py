@@ -0,0 +1,21 @@
+# Generated by Django 3.2.9 on 2026-10-19 00:45
+
+from django.db import migrations, models
+
+from core.migrations_utils import convert_dates_to_datetimes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(convert_dates_to_datetimes('users', ('user',)), migrations.RunPython.noop),
+    ]
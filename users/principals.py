@@ -0,0 +1,87 @@
+import threading, time
+
+from collections import OrderedDict, namedtuple
+
+from django.conf  import settings
+
+from core.metrics import metrics
+
+UserPrincipal = namedtuple('UserPrincipal', ['id', 'name', 'email'])
+
+class PrincipalCache:
+  """
+  Bounded LRU of verified access tokens mapped to UserPrincipal with a per-entry TTL.
+
+  Entries of a user are dropped from the process that saves or deletes the user;
+  other processes rely on the TTL.
+  """
+  def __init__(self, max_entries, timeout):
+    self.max_entries    = max_entries
+    self.timeout        = timeout
+    self.lock           = threading.Lock()
+    self.entries        = OrderedDict()
+    self.tokens_by_user = {}
+    self.hits           = 0
+    self.misses         = 0
+
+  def get(self, token):
+    with self.lock:
+      entry = self.entries.get(token)
+
+      if entry is None or entry[1] < time.monotonic():
+        if entry is not None:
+          self._remove(token)
+
+        self.misses += 1
+        metrics.inc('cache_requests_total', {'cache' : 'principals', 'result' : 'miss'})
+
+        return None
+
+      self.entries.move_to_end(token)
+      self.hits += 1
+      metrics.inc('cache_requests_total', {'cache' : 'principals', 'result' : 'hit'})
+
+      return entry[0]
+
+  def set(self, token, principal):
+    with self.lock:
+      if token in self.entries:
+        self._remove(token)
+
+      self.entries[token] = (principal, time.monotonic() + self.timeout)
+      self.tokens_by_user.setdefault(principal.id, set()).add(token)
+
+      while len(self.entries) > self.max_entries:
+        self._remove(next(iter(self.entries)))
+
+  def invalidate_user(self, user_id):
+    with self.lock:
+      for token in list(self.tokens_by_user.get(user_id, ())):
+        self._remove(token)
+
+  def clear(self):
+    with self.lock:
+      self.entries.clear()
+      self.tokens_by_user.clear()
+      self.hits   = 0
+      self.misses = 0
+
+  def stats(self):
+    return {
+      'hits'   : self.hits,
+      'misses' : self.misses,
+      'size'   : len(self.entries),
+    }
+
+  def _remove(self, token):
+    principal, _ = self.entries.pop(token)
+    tokens       = self.tokens_by_user.get(principal.id, set())
+    tokens.discard(token)
+
+    if not tokens:
+      self.tokens_by_user.pop(principal.id, None)
+
+principal_cache = PrincipalCache(
+  max_entries = settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+  timeout     = settings.PRINCIPAL_CACHE_TIMEOUT
+)
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch          import receiver
+
+from users.models             import User
+from users.principals         import principal_cache
+
+@receiver(post_save, sender = User)
+@receiver(post_delete, sender = User)
+def invalidate_principal(sender, instance, **kwargs):
+  principal_cache.invalidate_user(instance.id)
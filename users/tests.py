@@ -1,10 +1,18 @@
-import json, bcrypt
-
-from django.test   import TestCase, Client
-from unittest.mock import patch
-
-from .models       import User
-from my_settings   import ALGORITHM, SECRET_KEY
+import json, bcrypt, jwt
+
+from django.conf                    import settings
+from django.contrib.sessions.models import Session
+from django.core.cache              import caches
+from django.http                    import JsonResponse
+from django.test                    import TestCase, Client, RequestFactory, override_settings
+from unittest.mock                  import patch
+
+from core.metrics                   import metrics
+from .hashing                       import HashingPoolSaturated, get_rounds, password_hasher
+from .models                        import User
+from .principals                    import principal_cache
+from .utils                         import login_decorator
+from my_settings                    import ALGORITHM, SECRET_KEY
 
 class SignUpTest(TestCase):
   def setUp(self):
@@ -24,6 +32,7 @@ class SignUpTest(TestCase):
     )
 
   def tearDown(self):
+    caches[settings.RATE_LIMIT_CACHE].clear()
     User.objects.all().delete()
 
   def test_signup_success(self):
@@ -109,6 +118,7 @@ class SignInTest(TestCase):
     )
 
   def tearDown(self):
+    caches[settings.RATE_LIMIT_CACHE].clear()
     User.objects.all().delete()
 
   def test_signin_success(self):
@@ -124,6 +134,7 @@ class SignInTest(TestCase):
 
     self.assertEqual(response.json(),{'ACCESS_TOKEN' : access_token,})
     self.assertEqual(response.status_code, 200)
+    self.assertFalse(Session.objects.exists())
 
   def test_signin_failure_invalid_email(self):
     client = Client()
@@ -161,4 +172,129 @@ class SignInTest(TestCase):
     response = client.post('/users/signin', json.dumps(user), content_type = 'application/json')
 
     self.assertEqual(response.json(),{'MESSAGE' : 'KEY_ERROR'})
-    self.assertEqual(response.status_code, 400)
\ No newline at end of file
+    self.assertEqual(response.status_code, 400)
+
+  @override_settings(BCRYPT_ROUNDS = 4)
+  def test_signin_rehashes_password_on_cost_change(self):
+    client = Client()
+
+    user = {
+      'email'    : 'rlaalsgh@gmail.com',
+      'password' : 'rlaalsgh11!'
+    }
+
+    response = client.post('/users/signin', json.dumps(user), content_type = 'application/json')
+
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(get_rounds(User.objects.get(id = 1).password), 4)
+    self.assertEqual(client.post('/users/signin', json.dumps(user), content_type = 'application/json').status_code, 200)
+
+  def test_signin_failure_hashing_pool_saturated(self):
+    client = Client()
+
+    user = {
+      'email'    : 'rlaalsgh@gmail.com',
+      'password' : 'rlaalsgh11!'
+    }
+
+    with patch.object(password_hasher, 'submit', side_effect = HashingPoolSaturated):
+      response = client.post('/users/signin', json.dumps(user), content_type = 'application/json')
+
+    self.assertEqual(response.json(),{'MESSAGE' : 'SERVER_BUSY'})
+    self.assertEqual(response.status_code, 503)
+    self.assertEqual(response['Retry-After'], '1')
+
+
+@override_settings(RATE_LIMITS = {'signin' : {'ip' : (3, 60), 'email' : (2, 60)}, 'signup' : {'ip' : (1, 60)}})
+class RateLimitTest(TestCase):
+  def setUp(self):
+    metrics.reset()
+
+  def tearDown(self):
+    caches[settings.RATE_LIMIT_CACHE].clear()
+
+  def signin(self, email, remote_addr = '10.0.0.1'):
+    user = {
+      'email'    : email,
+      'password' : 'rlaalsgh11!'
+    }
+
+    return Client().post('/users/signin', json.dumps(user), content_type = 'application/json', REMOTE_ADDR = remote_addr)
+
+  def test_signin_throttled_per_email_before_any_work(self):
+    self.signin('rlaalsgh@gmail.com')
+    self.signin('rlaalsgh@gmail.com', remote_addr = '10.0.0.2')
+
+    with patch.object(password_hasher, 'submit') as submit, self.assertNumQueries(0):
+      response = self.signin('RLAALSGH@gmail.com', remote_addr = '10.0.0.3')
+
+    submit.assert_not_called()
+    self.assertEqual(response.json(), {'MESSAGE' : 'TOO_MANY_REQUESTS'})
+    self.assertEqual(response.status_code, 429)
+    self.assertEqual(response['Retry-After'], '30')
+    self.assertIn('rate_limit_requests_total{result="throttled_email",route="signin"} 1', metrics.render().splitlines())
+    self.assertEqual(self.signin('other@gmail.com', remote_addr = '10.0.0.3').status_code, 401)
+
+  def test_signin_throttled_per_ip(self):
+    for number in range(3):
+      self.assertEqual(self.signin(f'user{number}@gmail.com').status_code, 401)
+
+    self.assertEqual(self.signin('user3@gmail.com').status_code, 429)
+    self.assertEqual(self.signin('user3@gmail.com', remote_addr = '10.0.0.2').status_code, 401)
+
+  def test_signup_throttled_per_ip(self):
+    client = Client()
+
+    user = {
+      'name'     : '박치훈',
+      'email'    : 'qkrclgns',
+      'password' : 'qkrclgns11!'
+    }
+
+    self.assertEqual(client.post('/users/signup', json.dumps(user), content_type = 'application/json').status_code, 400)
+    self.assertEqual(client.post('/users/signup', json.dumps(user), content_type = 'application/json').status_code, 429)
+
+
+class LoginDecoratorTest(TestCase):
+  def setUp(self):
+    principal_cache.clear()
+
+    self.user    = User.objects.create(id = 1, name = '김민호', email = 'rlaalsgh@gmail.com', password = 'rlaalsgh11!')
+    self.request = RequestFactory().get('/', HTTP_AUTHORIZATION = jwt.encode({'id' : 1}, SECRET_KEY, algorithm = ALGORITHM))
+
+  def tearDown(self):
+    principal_cache.clear()
+    User.objects.all().delete()
+
+  @login_decorator
+  def view(self, request):
+    return JsonResponse({'user_id' : request.user.id, 'name' : request.user.name}, status = 200)
+
+  def test_login_decorator_caches_principal(self):
+    self.view(self.request)
+
+    with self.assertNumQueries(0):
+      response = self.view(self.request)
+
+    self.assertEqual(json.loads(response.content), {'user_id' : 1, 'name' : '김민호'})
+    self.assertEqual(principal_cache.stats(), {'hits' : 1, 'misses' : 1, 'size' : 1})
+
+  def test_login_decorator_invalidates_changed_user(self):
+    self.view(self.request)
+
+    self.user.name = '김민우'
+    self.user.save()
+
+    response = self.view(self.request)
+
+    self.assertEqual(json.loads(response.content), {'user_id' : 1, 'name' : '김민우'})
+
+  def test_login_decorator_invalidates_deleted_user(self):
+    self.view(self.request)
+
+    self.user.delete()
+
+    response = self.view(self.request)
+
+    self.assertEqual(response.status_code, 400)
+    self.assertEqual(json.loads(response.content), {'MESSAGE' : 'INVALID_USER'})
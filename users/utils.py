@@ -1,17 +1,42 @@
 import jwt
 
-from django.http  import JsonResponse
+from django.http      import JsonResponse
 
-from my_settings  import SECRET_KEY, ALGORITHM
-from users.models import User
+from core.routers     import PRIMARY
+from my_settings      import SECRET_KEY, ALGORITHM
+from users.models     import User
+from users.principals import UserPrincipal, principal_cache
+
+def get_user_id(request):
+  """
+  Returns the user id of a valid access token without loading the user, or None for anonymous requests.
+  """
+  access_token = request.headers.get('Authorization')
+  principal    = principal_cache.get(access_token) if access_token else None
+
+  if principal is not None:
+    return principal.id
+
+  try:
+    return jwt.decode(access_token, SECRET_KEY, algorithms = ALGORITHM)['id'] if access_token else None
+
+  except (jwt.exceptions.InvalidTokenError, KeyError):
+    return None
 
 def login_decorator(func):
   def wrapper(self, request, *args, **kwargs):
     try:
       access_token = request.headers.get('Authorization')
-      payload      = jwt.decode(access_token, SECRET_KEY, algorithms = ALGORITHM)
-      user         = User.objects.get(id = payload['id'])
-      request.user = user
+      principal    = principal_cache.get(access_token) if access_token else None
+
+      if principal is None:
+        payload   = jwt.decode(access_token, SECRET_KEY, algorithms = ALGORITHM)
+        # a user who just signed up may not have reached the replicas yet
+        user      = User.objects.using(PRIMARY).get(id = payload['id'])
+        principal = UserPrincipal(id = user.id, name = user.name, email = user.email)
+        principal_cache.set(access_token, principal)
+
+      request.user = principal
 
     except jwt.exceptions.DecodeError:
       return JsonResponse({'MESSAGE' : 'INVALID_TOKEN'}, status = 400)
@@ -21,4 +46,4 @@ def login_decorator(func):
 
     return func(self, request, *args, **kwargs)
 
-  return wrapper 
\ No newline at end of file
+  return wrapper 
@@ -1,12 +1,25 @@
-import json, re, bcrypt, jwt
+import json, re, jwt
 
-from django.http  import JsonResponse
-from django.views import View
+from django.conf             import settings
+from django.http             import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views            import View
 
-from users.models import User
-from my_settings  import SECRET_KEY, ALGORITHM
+from core.ratelimit          import rate_limit
+from users.hashing           import HashingPoolSaturated, password_hasher
+from users.models            import User
+from my_settings             import SECRET_KEY, ALGORITHM
+
+def server_busy():
+  response                = JsonResponse({'MESSAGE' : 'SERVER_BUSY'}, status = 503)
+  response['Retry-After'] = settings.BCRYPT_RETRY_AFTER
+
+  return response
 
 class SignUpView(View):
+  query_budget = {'post' : 2}
+
+  @method_decorator(rate_limit('signup', cost = password_hasher.expected_duration))
   def post(self, request):
     try:
       data     = json.loads(request.body)
@@ -26,8 +39,7 @@ class SignUpView(View):
       if User.objects.filter(email = email).exists():
         return JsonResponse({'MESSAGE' : 'DUPLICATED_EMAIL'}, status = 409)
 
-      hashed_password  = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-      decoded_password = hashed_password.decode('utf-8')
+      decoded_password = password_hasher.hash(password)
 
       User.objects.create(
         name     = name,
@@ -40,7 +52,13 @@ class SignUpView(View):
     except KeyError:
       return JsonResponse({'MESSAGE' : 'KEY_ERROR'}, status = 400)
 
+    except HashingPoolSaturated:
+      return server_busy()
+
 class SignInView(View):
+  query_budget = {'post' : 3}
+
+  @method_decorator(rate_limit('signin', cost = password_hasher.expected_duration))
   def post(self, request):
     try:
       data = json.loads(request.body)
@@ -53,13 +71,22 @@ class SignInView(View):
 
       user = User.objects.get(email = email)
       
-      if not bcrypt.checkpw(password.encode('utf-8'), user.password.encode('utf-8')):
+      if not password_hasher.check(password, user.password):
         return JsonResponse({'MESSAGE' : 'INVALID_PASSWORD'}, status = 401)
 
-      access_token            = jwt.encode({'id' : user.id}, SECRET_KEY, algorithm = ALGORITHM)
-      request.session['user'] = user.id
+      if password_hasher.needs_rehash(user.password):
+        try:
+          User.objects.filter(id = user.id).update(password = password_hasher.hash(password))
+
+        except HashingPoolSaturated:
+          pass
+
+      access_token = jwt.encode({'id' : user.id}, SECRET_KEY, algorithm = ALGORITHM)
 
       return JsonResponse({'ACCESS_TOKEN' : access_token}, status = 200)
 
     except KeyError:
-      return JsonResponse({'MESSAGE' : 'KEY_ERROR'}, status = 400)
\ No newline at end of file
+      return JsonResponse({'MESSAGE' : 'KEY_ERROR'}, status = 400)
+
+    except HashingPoolSaturated:
+      return server_busy()
\ No newline at end of file